@@ -0,0 +1,84 @@
+"""Measure how long common pythosf imports take in a fresh interpreter.
+
+Each statement runs in new subprocesses and the median wall time is reported, along with whether heavy optional
+dependencies were loaded. Use --baseline to flag startup regressions the same way as suite.py.
+
+    python benchmarks/import_time.py --output import_baseline.json
+    python benchmarks/import_time.py --baseline import_baseline.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from suite import compare  # noqa: E402
+
+STATEMENTS = {
+    'import_pythosf': 'import pythosf',
+    'bearer_auth': 'from pythosf import BearerAuth; BearerAuth("token")',
+    'session': 'from pythosf.client import Session; Session("https://api.osf.io/")',
+    'session_and_file': 'from pythosf.client import File, Session',
+    'all_resources': 'from pythosf.client import File, Folder, Node, Provider, Session, User',
+}
+HEAVY_MODULES = ('requests', 'requests_oauthlib', 'oauthlib', 'sqlite3', 'aiohttp')
+
+PROBE = '''
+import sys, time
+started = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - started
+print(repr((elapsed, sorted(name for name in {heavy!r} if name in sys.modules))))
+'''
+
+
+def measure(statement, repeat):
+    timings, loaded = [], []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+                                cwd=ROOT, check=True, capture_output=True, text=True).stdout
+        elapsed, loaded = eval(output)
+        timings.append(elapsed)
+    return {'seconds': statistics.median(timings), 'min_seconds': min(timings), 'loaded_modules': loaded}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', help='write results to this JSON file (default: stdout)')
+    parser.add_argument('--baseline', help='compare against results saved by an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.25, help='relative change flagged as a regression')
+    parser.add_argument('--repeat', type=int, default=15)
+    args = parser.parse_args()
+
+    results = {name: measure(statement, args.repeat) for name, statement in STATEMENTS.items()}
+    report = {'python': sys.version.split()[0], 'repeat': args.repeat, 'results': results}
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        numeric = {name: {'seconds': result['seconds']} for name, result in results.items()}
+        report['comparison'], regressions = compare(numeric, baseline.get('results', {}), args.threshold)
+        for name, result in results.items():
+            # Newly pulled-in heavy dependencies are a regression even when the timing noise hides them.
+            previous = set(baseline.get('results', {}).get(name, {}).get('loaded_modules', result['loaded_modules']))
+            for module in sorted(set(result['loaded_modules']) - previous):
+                regressions.append('{}.loads_{}'.format(name, module))
+        report['regressions'] = regressions
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output + '\n')
+    else:
+        print(output)
+    if regressions:
+        print('Regressions: {}'.format(', '.join(regressions)), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
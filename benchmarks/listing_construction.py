@@ -0,0 +1,111 @@
+"""Measure the cost of building File objects for a large Folder listing.
+
+Compares the current lazy APIDetail model with the previous eager one, which copied every
+attribute onto the instance and built three TopLevelData objects per entry.
+
+    python benchmarks/listing_construction.py --entries 100000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pythosf.client.file import File  # noqa: E402
+from pythosf.utils import save_attribute_items, unwrap_data  # noqa: E402
+
+
+def listing_entry(index):
+    path = '/5e1f{:08x}'.format(index)
+    return {
+        'id': path.lstrip('/'),
+        'type': 'files',
+        'attributes': {
+            'guid': None, 'checkout': None, 'name': 'file-{}.csv'.format(index), 'kind': 'file',
+            'path': path, 'size': 1024 + index, 'provider': 'osfstorage',
+            'materialized_path': '/data/file-{}.csv'.format(index), 'last_touched': None,
+            'date_modified': '2020-01-01T00:00:00.000000', 'date_created': '2020-01-01T00:00:00.000000',
+            'extra': {'hashes': {'md5': '0' * 32, 'sha256': '0' * 64}, 'downloads': 0},
+            'tags': [], 'current_user_can_comment': True, 'current_version': 1,
+        },
+        'relationships': {
+            'node': {'links': {'related': {'href': 'https://api.osf.io/v2/nodes/abcde/', 'meta': {}}}},
+            'versions': {'links': {'related': {'href': 'https://api.osf.io/v2/files{}/versions/'.format(path),
+                                               'meta': {}}}},
+        },
+        'links': {
+            'info': 'https://api.osf.io/v2/files{}/'.format(path),
+            'move': 'https://files.osf.io/v1/resources/abcde/providers/osfstorage{}'.format(path),
+            'upload': 'https://files.osf.io/v1/resources/abcde/providers/osfstorage{}'.format(path),
+            'delete': 'https://files.osf.io/v1/resources/abcde/providers/osfstorage{}'.format(path),
+            'download': 'https://osf.io/download/{}/'.format(path.lstrip('/')),
+            'self': 'https://api.osf.io/v2/files{}/'.format(path),
+        },
+    }
+
+
+class EagerTopLevelData:
+    def __init__(self, response, tld_key):
+        tld = unwrap_data(response).get(tld_key, None)
+        if tld:
+            save_attribute_items(self, response_attributes=tld)
+
+
+class EagerFile:
+    def __init__(self, session, data):
+        self.session = session
+        response_data = unwrap_data(data)
+        save_attribute_items(self, response_attributes=response_data['attributes'])
+        self.id = response_data.get('id', None)
+        self.relationships = EagerTopLevelData(response=data, tld_key='relationships')
+        self.links = EagerTopLevelData(response=data, tld_key='links')
+        self.meta = EagerTopLevelData(response=data, tld_key='meta')
+
+
+def measure(factory, entries):
+    started = time.perf_counter()
+    files = [factory(session=None, data=entry) for entry in entries]
+    built = time.perf_counter()
+    total_size = sum(item.size for item in files)
+    accessed = time.perf_counter()
+    # Lazily decoded values are kept on the instance, so a second read costs the same as an eager one.
+    assert sum(item.size for item in files) == total_size
+    reread = time.perf_counter()
+    assert total_size
+    del files
+
+    # Memory is measured in a separate pass because tracing allocations distorts the timings.
+    tracemalloc.start()
+    files = [factory(session=None, data=entry) for entry in entries]
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del files
+    return {
+        'construct_seconds': built - started,
+        'attribute_access_seconds': accessed - built,
+        'repeated_access_seconds': reread - accessed,
+        'retained_bytes': retained,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=100000)
+    args = parser.parse_args()
+
+    entries = [listing_entry(index) for index in range(args.entries)]
+    results = {
+        'entries': args.entries,
+        'eager': measure(EagerFile, entries),
+        'lazy': measure(File, entries),
+    }
+    results['construct_speedup'] = results['eager']['construct_seconds'] / results['lazy']['construct_seconds']
+    results['memory_reduction'] = results['eager']['retained_bytes'] / results['lazy']['retained_bytes']
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
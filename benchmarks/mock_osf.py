@@ -0,0 +1,223 @@
+"""A local stand-in for the OSF API and WaterButler, used by the benchmark suite.
+
+Serves paginated JSON:API folder listings, file and node details, large downloads with Range support,
+uploads and move/copy, with configurable per-request latency and periodic 429 responses.
+"""
+import hashlib
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+NODE_ID = 'bench'
+FOLDER_PATH = '/5e1f00000000000000000000/'
+
+
+def file_id(index):
+    return '5e1f{:020x}'.format(index + 1)
+
+
+class MockOSF:
+    def __init__(self, entries=1000, per_page=10, file_size=16 * 1024 * 1024, latency=0.0, throttle_every=0):
+        self.entries = entries
+        self.per_page = per_page
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.body = (bytes(range(256)) * (file_size // 256 + 1))[:file_size]
+        self.md5 = hashlib.md5(self.body).hexdigest()
+        self.request_count = 0
+        self.throttled_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return 'http://127.0.0.1:{}/'.format(self._server.server_address[1])
+
+    @property
+    def folder_listing_url(self):
+        return '{}v2/nodes/{}/files/osfstorage{}'.format(self.base_url, NODE_ID, FOLDER_PATH)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def should_throttle(self):
+        with self._lock:
+            self.request_count += 1
+            if self.throttle_every and self.request_count % self.throttle_every == 0:
+                self.throttled_count += 1
+                return True
+        return False
+
+    def file_entry(self, index, size=None):
+        path = '/' + file_id(index)
+        wb_url = '{}v1/resources/{}/providers/osfstorage{}'.format(self.base_url, NODE_ID, path)
+        return {
+            'id': file_id(index),
+            'type': 'files',
+            'attributes': {
+                'guid': None, 'checkout': None, 'name': 'file-{}.csv'.format(index), 'kind': 'file',
+                'path': path, 'size': len(self.body) if size is None else size, 'provider': 'osfstorage',
+                'materialized_path': '/data/file-{}.csv'.format(index), 'last_touched': None,
+                'date_modified': '2020-01-01T00:00:00.000000', 'date_created': '2020-01-01T00:00:00.000000',
+                'extra': {'hashes': {'md5': self.md5, 'sha256': None}, 'downloads': 0},
+                'tags': [], 'current_user_can_comment': True, 'current_version': 1,
+            },
+            'relationships': {
+                'node': {'data': {'id': NODE_ID, 'type': 'nodes'},
+                         'links': {'related': {'href': '{}v2/nodes/{}/'.format(self.base_url, NODE_ID)}}},
+            },
+            'links': {
+                'info': '{}v2/files{}/'.format(self.base_url, path),
+                'self': '{}v2/files{}/'.format(self.base_url, path),
+                'move': wb_url,
+                'upload': wb_url,
+                'delete': wb_url,
+                'download': '{}download{}/'.format(self.base_url, path),
+            },
+        }
+
+    def folder_entry(self):
+        wb_url = '{}v1/resources/{}/providers/osfstorage{}'.format(self.base_url, NODE_ID, FOLDER_PATH)
+        return {
+            'id': FOLDER_PATH.strip('/'),
+            'type': 'files',
+            'attributes': {'name': 'data', 'kind': 'folder', 'path': FOLDER_PATH, 'provider': 'osfstorage',
+                           'materialized_path': '/data/'},
+            'relationships': {
+                'files': {'links': {'related': {'href': self.folder_listing_url}}},
+                'node': {'data': {'id': NODE_ID, 'type': 'nodes'}},
+            },
+            'links': {'upload': wb_url, 'new_folder': wb_url + '?kind=folder', 'move': wb_url, 'delete': wb_url},
+        }
+
+    def listing_page(self, page, per_page):
+        start = (page - 1) * per_page
+        stop = min(start + per_page, self.entries)
+        next_url = None
+        if stop < self.entries:
+            query = urllib.parse.urlencode({'page': page + 1, 'page[size]': per_page})
+            next_url = '{}?{}'.format(self.folder_listing_url, query)
+        meta = {'total': self.entries, 'per_page': per_page}
+        return {
+            'data': [self.file_entry(index, size=1024 + index) for index in range(start, stop)],
+            'links': {'next': next_url, 'meta': meta},
+            'meta': meta,
+        }
+
+    def wb_entry(self, path):
+        return {'data': {'id': 'osfstorage' + path, 'type': 'files', 'attributes': {
+            'provider': 'osfstorage', 'resource': NODE_ID, 'path': path, 'name': path.strip('/'), 'kind': 'file',
+            'size': len(self.body), 'materialized': path, 'extra': {'hashes': {'md5': self.md5}},
+        }}}
+
+
+def _handler(mock):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status, body=b'', headers=None):
+            if not isinstance(body, bytes):
+                body = json.dumps(body).encode('utf-8')
+                headers = {'Content-Type': 'application/vnd.api+json', **(headers or {})}
+            self.send_response(status)
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _drain(self):
+            length = self.headers.get('Content-Length')
+            if length is not None:
+                remaining = int(length)
+                while remaining:
+                    remaining -= len(self.rfile.read(min(remaining, 1024 * 1024)))
+                return
+            if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+                while True:
+                    size = int(self.rfile.readline().split(b';')[0].strip(), 16)
+                    self.rfile.read(size + 2)
+                    if size == 0:
+                        return
+
+        def _begin(self):
+            if mock.latency:
+                time.sleep(mock.latency)
+            if mock.should_throttle():
+                self._drain()
+                self._reply(429, {'errors': [{'detail': 'Request was throttled.'}]}, {'Retry-After': '0'})
+                return None
+            return urllib.parse.urlsplit(self.path)
+
+        def do_GET(self):
+            url = self._begin()
+            if url is None:
+                return
+            query = urllib.parse.parse_qs(url.query)
+            path = url.path
+            if path == urllib.parse.urlsplit(mock.folder_listing_url).path:
+                page = int(query.get('page', ['1'])[0])
+                per_page = int(query.get('page[size]', [mock.per_page])[0])
+                return self._reply(200, mock.listing_page(page, per_page))
+            if path == '/v2/files{}'.format(FOLDER_PATH):
+                return self._reply(200, {'data': mock.folder_entry()})
+            if path.startswith('/v2/files/'):
+                return self._reply(200, {'data': mock.file_entry(0)})
+            if path.startswith('/download/'):
+                return self._download()
+            if path.startswith('/v2/nodes/'):
+                return self._reply(200, {'data': {'id': NODE_ID, 'type': 'nodes', 'attributes': {'title': 'bench'}}})
+            self._reply(404, {'errors': [{'detail': 'Not found.'}]})
+
+        def _download(self):
+            body = mock.body
+            byte_range = self.headers.get('Range')
+            if byte_range:
+                start, _, end = byte_range.split('=', 1)[1].partition('-')
+                start, end = int(start), int(end) if end else len(body) - 1
+                return self._reply(206, body[start:end + 1], {
+                    'Content-Range': 'bytes {}-{}/{}'.format(start, end, len(body)),
+                    'Content-Type': 'application/octet-stream'})
+            self._reply(200, body, {'Content-Type': 'application/octet-stream', 'Accept-Ranges': 'bytes'})
+
+        def do_PUT(self):
+            url = self._begin()
+            if url is None:
+                return
+            self._drain()
+            self._reply(201, mock.wb_entry('/' + file_id(0)))
+
+        def do_POST(self):
+            url = self._begin()
+            if url is None:
+                return
+            self._drain()
+            self._reply(201, mock.wb_entry('/' + file_id(0)))
+
+        def do_DELETE(self):
+            url = self._begin()
+            if url is None:
+                return
+            self._drain()
+            self._reply(204)
+
+    return Handler
@@ -0,0 +1,247 @@
+"""Run the offline benchmark suite against a local mock OSF/WaterButler server.
+
+Results are written as JSON and, given a baseline from an earlier run, compared metric by metric so that
+throughput, latency and memory regressions are flagged (the exit status is 1 when any are found).
+
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --baseline results.json --latency 0.005
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_osf import MockOSF  # noqa: E402
+from pythosf import client  # noqa: E402
+from pythosf.client.retry import RetryPolicy  # noqa: E402
+
+BENCHMARKS = []
+
+
+def benchmark(function):
+    BENCHMARKS.append(function)
+    return function
+
+
+def new_session(mock, args):
+    # A tiny backoff keeps the throttled runs measuring the client rather than sleep().
+    return client.Session(api_base_url=mock.base_url, config={'retry_policy': RetryPolicy(backoff_base=0.001),
+                                                              'json_codec': args.json_codec})
+
+
+def timed(function):
+    started = time.perf_counter()
+    function()
+    return time.perf_counter() - started
+
+
+def peak_memory(function):
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+@benchmark
+def session_get_retrieve_all(mock, session, args):
+    def run():
+        response = session.get(url=mock.folder_listing_url, retrieve_all=True)
+        assert len(response['data']) == mock.entries
+
+    seconds = measure(run, args.repeat)
+    return {'seconds': seconds, 'items_per_second': mock.entries / seconds, 'peak_bytes': peak_memory(run)}
+
+
+@benchmark
+def session_get_retrieve_all_throttled(mock, session, args):
+    def run():
+        response = session.get(url=mock.folder_listing_url, retrieve_all=True)
+        assert len(response['data']) == mock.entries
+
+    mock.throttle_every = args.throttle_every
+    throttled_before = mock.throttled_count
+    try:
+        seconds = measure(run, args.repeat)
+    finally:
+        mock.throttle_every = 0
+    return {'seconds': seconds, 'items_per_second': mock.entries / seconds,
+            'throttled_responses': mock.throttled_count - throttled_before}
+
+
+@benchmark
+def folder_get(mock, session, args):
+    folder = client.Folder(session=session, data={'data': mock.folder_entry()})
+
+    def run():
+        folder.get(retrieve_all=True)
+        assert len(folder.files) == mock.entries
+
+    seconds = measure(run, args.repeat)
+    return {'seconds': seconds, 'items_per_second': mock.entries / seconds, 'peak_bytes': peak_memory(run)}
+
+
+@benchmark
+def file_download(mock, session, args):
+    file = client.File(session=session, data={'data': mock.file_entry(0)})
+
+    def run():
+        file.download(to=io.BytesIO())
+
+    seconds = measure(run, args.repeat)
+    return {'seconds': seconds, 'megabytes_per_second': len(mock.body) / seconds / 1e6}
+
+
+@benchmark
+def file_download_ranges(mock, session, args):
+    file = client.File(session=session, data={'data': mock.file_entry(0)})
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'download')
+
+    def run():
+        file.download_ranges(to=path, range_size=len(mock.body) // 8)
+
+    try:
+        seconds = measure(run, args.repeat)
+    finally:
+        shutil.rmtree(directory)
+    return {'seconds': seconds, 'megabytes_per_second': len(mock.body) / seconds / 1e6}
+
+
+@benchmark
+def file_upload(mock, session, args):
+    file = client.File(session=session, data={'data': mock.file_entry(0)})
+
+    def run():
+        file.upload(data=io.BytesIO(mock.body))
+
+    seconds = measure(run, args.repeat)
+    return {'seconds': seconds, 'megabytes_per_second': len(mock.body) / seconds / 1e6}
+
+
+@benchmark
+def move_copy(mock, session, args):
+    folder = client.Folder(session=session, data={'data': mock.folder_entry()})
+    entry = {'data': mock.file_entry(0)}
+
+    def run():
+        for _ in range(args.operations):
+            file = client.File(session=session, data=entry)
+            file.copy(to_folder=folder, refresh=False)
+            file.move(to_folder=folder, refresh=False)
+
+    seconds = measure(run, args.repeat)
+    return {'seconds': seconds, 'operations_per_second': 2 * args.operations / seconds}
+
+
+@benchmark
+def apidetail_construction(mock, session, args):
+    entries = [{'data': mock.file_entry(index, size=index)} for index in range(args.construct_entries)]
+
+    def run():
+        files = [client.File(session=session, data=entry) for entry in entries]
+        assert sum(item.size for item in files) >= 0
+        return files
+
+    seconds = measure(run, args.repeat)
+    tracemalloc.start()
+    files = run()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del files
+    return {'seconds': seconds, 'objects_per_second': len(entries) / seconds, 'retained_bytes': retained}
+
+
+def measure(run, repeat):
+    run()
+    return statistics.median(timed(run) for _ in range(repeat))
+
+
+def lower_is_better(metric):
+    if metric.endswith('_per_second'):
+        return False
+    if metric.endswith('seconds') or metric.endswith('_bytes'):
+        return True
+    return None
+
+
+def compare(results, baseline, threshold):
+    comparison, regressions = {}, []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            previous = baseline.get(name, {}).get(metric)
+            direction = lower_is_better(metric)
+            if previous is None or direction is None or not previous:
+                continue
+            change = (value - previous) / previous
+            regressed = change > threshold if direction else change < -threshold
+            comparison['{}.{}'.format(name, metric)] = {
+                'baseline': previous, 'current': value, 'change': change, 'regression': regressed}
+            if regressed:
+                regressions.append('{}.{}'.format(name, metric))
+    return comparison, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', help='write results to this JSON file (default: stdout)')
+    parser.add_argument('--baseline', help='compare against results saved by an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.15, help='relative change flagged as a regression')
+    parser.add_argument('--only', action='append', help='run only the named benchmark (repeatable)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--entries', type=int, default=1000, help='items in the mock folder listing')
+    parser.add_argument('--per-page', type=int, default=10)
+    parser.add_argument('--file-size', type=int, default=16 * 1024 * 1024)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every mock response')
+    parser.add_argument('--throttle-every', type=int, default=50, help='answer every Nth request with a 429')
+    parser.add_argument('--operations', type=int, default=50, help='move/copy pairs per repetition')
+    parser.add_argument('--construct-entries', type=int, default=20000)
+    parser.add_argument('--json-codec', default='auto', help="'json', 'orjson', 'ujson' or 'auto'")
+    args = parser.parse_args()
+
+    selected = [function for function in BENCHMARKS if not args.only or function.__name__ in args.only]
+    results = {}
+    with MockOSF(entries=args.entries, per_page=args.per_page, file_size=args.file_size,
+                 latency=args.latency) as mock:
+        for function in selected:
+            with new_session(mock, args) as session:
+                results[function.__name__] = function(mock, session, args)
+            print('{}: {}'.format(function.__name__, json.dumps(results[function.__name__])), file=sys.stderr)
+
+    report = {
+        'environment': {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+                        'platform': platform.platform()},
+        'settings': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+        'results': results,
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        report['comparison'], regressions = compare(results, baseline.get('results', {}), args.threshold)
+        report['regressions'] = regressions
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output + '\n')
+    else:
+        print(output)
+    if regressions:
+        print('Regressions: {}'.format(', '.join(regressions)), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
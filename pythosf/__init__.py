@@ -1,3 +1,17 @@
-from pythosf.utils import bearer_token_auth
+import importlib
 
-__all__ = ['client', 'exceptions', 'bearer_token_auth', ]
\ No newline at end of file
+__all__ = ['client', 'exceptions', 'bearer_token_auth', 'BearerAuth', ]
+
+
+def __getattr__(name):
+    # Submodules and auth helpers are loaded on first use so `import pythosf` stays cheap (PEP 562).
+    if name in ('client', 'exceptions'):
+        return importlib.import_module('.' + name, __name__)
+    if name in ('bearer_token_auth', 'BearerAuth'):
+        from . import utils
+        return getattr(utils, name)
+    raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,9 +1,16 @@
-from .file import File
-from .folder import Folder
-from .node import Node
-from .provider import Provider
-from .session import Session
-from .user import User
+import importlib
+
+# Each class is imported from its module on first access (PEP 562), so using one resource type does not load
+# the others.
+_CLASS_MODULES = {
+    'File': '.file',
+    'Folder': '.folder',
+    'Node': '.node',
+    'Provider': '.provider',
+    'Session': '.session',
+    'SessionManager': '.manager',
+    'User': '.user',
+}
 
 __all__ = [
     'File',
@@ -11,5 +18,19 @@ __all__ = [
     'Node',
     'Provider',
     'Session',
+    'SessionManager',
     'User',
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    module = _CLASS_MODULES.get(name)
+    if module is None:
+        raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
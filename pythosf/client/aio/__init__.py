@@ -0,0 +1,15 @@
+from .file import AsyncFile
+from .folder import AsyncFolder
+from .node import AsyncNode
+from .provider import AsyncProvider
+from .session import AsyncSession
+from .user import AsyncUser
+
+__all__ = [
+    'AsyncFile',
+    'AsyncFolder',
+    'AsyncNode',
+    'AsyncProvider',
+    'AsyncSession',
+    'AsyncUser',
+]
@@ -0,0 +1,80 @@
+from ... import exceptions
+from ..file import File
+
+
+class AsyncFile(File):
+    def __init__(self, session, node=None, location=None, name=None, data=None):
+        super().__init__(session=session, node=node, location=location, name=name, data=data)
+
+    @classmethod
+    async def from_wb(cls, session, wb_data, auth=None):
+        new_file = cls(session=session)
+        await new_file._update_from_wb(wb_data=wb_data, auth=auth)
+        return new_file
+
+    async def _update_from_wb(self, wb_data, auth=None):
+        auth = auth or self.session.auth
+        osf_url = self._osf_url_from_wb(wb_data=wb_data)
+        response = await self.session.get(url=osf_url, auth=auth)
+        self._update(response=response)
+
+    async def get(self, url=None, query_parameters=None, auth=None):
+        if url:
+            self.location = url
+        elif self.links.self:
+            self.location = self.links.self
+
+        response = await self.session.get(
+            url=self.location, query_parameters=query_parameters, auth=auth)
+        self._update(response=response)
+
+    async def download(self, query_parameters=None, auth=None):
+        # File contents are returned as bytes rather than decoded as a JSON:API document.
+        url = self.links.download
+        return await self.session.get(url=url, query_parameters=query_parameters, auth=auth, raw=True)
+
+    def download_ranges(self, to, workers=None, range_size=None, verify=True, query_parameters=None, stats=None,
+                        auth=None):
+        raise exceptions.UnsupportedMethod("Ranged downloads are only available on the synchronous File")
+
+    async def upload(self, data, query_parameters=None, auth=None):
+        url = self.links.upload
+        query_parameters = query_parameters or {}
+        upload_query_parameters = {
+            'kind': 'file',
+        }
+        combined_query_parameters = {
+            **query_parameters, **upload_query_parameters}
+        return await self.session.put(url=url, query_parameters=combined_query_parameters, raw_body=data,
+                                      auth=auth)
+
+    async def _move_or_copy(self, to_folder, action, rename=None, conflict=None, query_parameters=None, auth=None):
+        raw_body = self._move_or_copy_body(to_folder=to_folder, action=action, rename=rename, conflict=conflict)
+        url = self.links.move
+        return await self.session.post(url=url, raw_body=raw_body, query_parameters=query_parameters, auth=auth)
+
+    async def move(self, to_folder, rename=None, conflict=None, query_parameters=None, auth=None):
+        moved_file = await self._move_or_copy(to_folder=to_folder, action='move', rename=rename, conflict=conflict,
+                                              query_parameters=query_parameters, auth=auth)
+        await self._update_from_wb(wb_data=moved_file, auth=auth)
+
+    async def copy(self, to_folder, rename=None, conflict=None, query_parameters=None, auth=None):
+        new_file = await self._move_or_copy(to_folder=to_folder, action='copy', rename=rename, conflict=conflict,
+                                            query_parameters=query_parameters, auth=auth)
+        return await AsyncFile.from_wb(session=self.session, wb_data=new_file, auth=auth)
+
+    async def delete(self, query_parameters=None, auth=None):
+        url = self.links.delete
+        return await self.session.delete(url=url, item_type=self.type, query_parameters=query_parameters,
+                                         auth=auth)
+
+    async def rename(self, name, query_parameters=None, auth=None):
+        body = {
+            'action': 'rename',
+            'rename': name
+        }
+        raw_body = self.session.codec.dumps(body)
+        url = self.links.move
+        response = await self.session.post(
+            url=url, raw_body=raw_body, query_parameters=query_parameters, auth=auth)
+        self._update(response=response)
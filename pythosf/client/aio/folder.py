@@ -0,0 +1,86 @@
+from ... import exceptions
+from ..folder import Folder
+from .file import AsyncFile
+
+
+def async_file_or_folder(session, data):
+    file_kind = data['attributes']['kind']
+    if file_kind == 'file':
+        return AsyncFile(session=session, data=data)
+    elif file_kind == 'folder':
+        return AsyncFolder(session=session, data=data)
+    return None
+
+
+class AsyncFolder(AsyncFile, Folder):
+    async def get(self, auth=None, append=False, query_parameters=None, retrieve_all=False):
+        url = self.relationships.files['links']['related']['href']
+        response = await self.session.get(
+            url=url, auth=auth, retrieve_all=retrieve_all, query_parameters=query_parameters)
+        if response:
+            files = response['data']
+            if not append:
+                self.files = []
+            for file in files:
+                item = async_file_or_folder(session=self.session, data=file)
+                if item is not None:
+                    self.files.append(item)
+
+    async def iter_files(self, auth=None, query_parameters=None, page_size=None, prefetch=True):
+        url = self.relationships.files['links']['related']['href']
+        pages = self.session.iter_pages(url=url, query_parameters=query_parameters, page_size=page_size,
+                                        auth=auth, prefetch=prefetch)
+        async for page in pages:
+            for file in page['data']:
+                item = async_file_or_folder(session=self.session, data=file)
+                if item is not None:
+                    yield item
+
+    async def download(self, query_parameters=None, auth=None):
+        raise exceptions.UnsupportedMethod("Cannot download a folder")
+
+    def download_ranges(self, to, workers=None, range_size=None, verify=True, query_parameters=None, stats=None,
+                        auth=None):
+        raise exceptions.UnsupportedMethod("Cannot download a folder")
+
+    def walk(self, workers=None, max_depth=None, include=None, exclude=None, page_size=None, stats=None, auth=None):
+        raise exceptions.UnsupportedMethod("walk is only available on the synchronous Folder; use iter_files")
+
+    async def list(
+        self, auth=None,
+        append=False,
+        query_parameters=None,
+        retrieve_all=False
+    ):
+        return await self.get(
+            auth=auth,
+            append=append,
+            query_parameters=query_parameters,
+            retrieve_all=retrieve_all
+        )
+
+    async def create(self, name, query_parameters=None, auth=None):
+        url = self.links.new_folder
+        query_parameters = query_parameters or {}
+        create_query_parameters = {
+            'kind': 'folder',
+            'name': name,
+        }
+        combined_query_parameters = {
+            **query_parameters, **create_query_parameters}
+        new_folder_data = await self.session.put(
+            url=url, query_parameters=combined_query_parameters, raw_body='', auth=auth)
+        return await AsyncFolder.from_wb(session=self.session, wb_data=new_folder_data, auth=auth)
+
+    async def upload(self, name, data, query_parameters=None, auth=None):
+        url = self.links.upload
+        query_parameters = query_parameters or {}
+        upload_query_parameters = {
+            'kind': 'file',
+            'name': name,
+        }
+        combined_query_parameters = {
+            **query_parameters, **upload_query_parameters}
+        new_file_data = await self.session.put(
+            url=url, query_parameters=combined_query_parameters, raw_body=data, auth=auth)
+        return await AsyncFile.from_wb(session=self.session, wb_data=new_file_data, auth=auth)
@@ -0,0 +1,93 @@
+from ... import exceptions
+from ..node import Node
+from .provider import AsyncProvider
+
+
+class AsyncNode(Node):
+    async def create(self, title, category="project", description=None, public=None, tags=None,
+                     template_from=None, query_parameters=None, auth=None):
+        saved_args = locals()
+        attributes = self.session.remove_none_items(saved_args)
+        response = await self.session.post(url='/v2/nodes/', item_type=self.type, attributes=attributes,
+                                           query_parameters=query_parameters, auth=auth)
+        if response:
+            self._update(response=response)
+        return self
+
+    async def create_child(self, title, category="project", description=None, public=None, tags=None,
+                           template_from=None, query_parameters=None, auth=None):
+        saved_args = locals()
+        attributes = self.session.remove_none_items(saved_args)
+        child_node = AsyncNode(session=self.session)
+        url = self.relationships.children['links']['related']['href']
+        response = await self.session.post(url=url, item_type=self.type, attributes=attributes,
+                                           query_parameters=query_parameters, auth=auth)
+        if response:
+            child_node._update(response=response)
+        return child_node
+
+    @classmethod
+    def bulk_create(cls, session, items, query_parameters=None, auth=None, bulk=True, workers=None):
+        raise exceptions.UnsupportedMethod("bulk_create is only available on the synchronous Node")
+
+    def bulk_create_children(self, items, query_parameters=None, auth=None, workers=None):
+        raise exceptions.UnsupportedMethod("bulk_create_children is only available on the synchronous Node")
+
+    @classmethod
+    def bulk_delete(cls, nodes, query_parameters=None, auth=None, bulk=True, workers=None):
+        raise exceptions.UnsupportedMethod("bulk_delete is only available on the synchronous Node")
+
+    async def delete(self, query_parameters=None, auth=None):
+        if self.id is None:
+            return None
+        else:
+            self_url = self.links.self
+            await self.session.delete(url=self_url, item_type=self.type,
+                                      query_parameters=query_parameters, auth=auth)
+            self.id = None
+            return None
+
+    async def get(self, query_parameters=None, auth=None):
+        url = None
+        if self.self_link:
+            url = self.self_link
+        elif self.links:
+            url = self.links.self
+        elif self.id:
+            url = '/v2/nodes/{}/'.format(self.id)
+
+        if url:
+            response = await self.session.get(
+                url=url, query_parameters=query_parameters, auth=auth)
+            if response:
+                self._update(response=response)
+        else:
+            raise ValueError(
+                "No url or id to get. Set the id or self_link then try to get.")
+
+    async def get_providers(self, query_parameters=None, auth=None):
+        if not getattr(self, 'relationships', False):
+            await self.get(auth=auth)
+        providers_url = self.relationships.files['links']['related']['href']
+        response = await self.session.get(
+            url=providers_url, query_parameters=query_parameters, auth=auth)
+        if response:
+            providers = response['data']
+            for provider in providers:
+                self.providers.append(
+                    AsyncProvider(session=self.session, data=provider))
+
+        return self.providers
+
+    async def iter_providers(self, query_parameters=None, page_size=None, auth=None):
+        if not getattr(self, 'relationships', False):
+            await self.get(auth=auth)
+        providers_url = self.relationships.files['links']['related']['href']
+        pages = self.session.iter_pages(url=providers_url, query_parameters=query_parameters,
+                                        page_size=page_size, auth=auth)
+        async for page in pages:
+            for provider in page['data']:
+                yield AsyncProvider(session=self.session, data=provider)
+
+    def walk(self, workers=None, max_depth=None, include=None, exclude=None, page_size=None, stats=None, auth=None):
+        raise exceptions.UnsupportedMethod("walk is only available on the synchronous Node; use iter_providers")
@@ -0,0 +1,5 @@
+from .folder import AsyncFolder
+
+
+class AsyncProvider(AsyncFolder):
+    pass
@@ -0,0 +1,297 @@
+import asyncio
+import time
+import aiohttp
+from typing import List
+from ... import exceptions
+from ...utils import auth_headers, json_api_parameters
+from .. import instrumentation
+from .. import retry as retries
+from ..session import Session
+from ..transport import PoolStats
+
+DEFAULT_CONNECTION_LIMIT = 100
+
+
+class _ResponseView:
+    # Gives a read aiohttp response the status_code/headers/content shape the shared Session helpers expect.
+    def __init__(self, response, content):
+        self.status_code = response.status
+        self.headers = response.headers
+        self.content = content
+
+
+def _query_params(query_parameters):
+    # List values (e.g. several embeds) become repeated parameters, as requests sends them.
+    if not query_parameters:
+        return None
+    params = []
+    for key, value in query_parameters.items():
+        if value is None:
+            continue
+        values = value if isinstance(value, (list, tuple)) else [value]
+        params.extend((key, str(item)) for item in values)
+    return params
+
+
+def _client_timeout(timeout):
+    if timeout is None:
+        return aiohttp.ClientTimeout(total=None)
+    if isinstance(timeout, tuple):
+        connect_timeout, read_timeout = timeout
+        return aiohttp.ClientTimeout(total=None, sock_connect=connect_timeout, sock_read=read_timeout)
+    return aiohttp.ClientTimeout(total=timeout)
+
+
+class AsyncSession(Session):
+    def __init__(self, api_base_url, auth=None, default_version=None, config=None):
+        super().__init__(api_base_url=api_base_url, auth=auth, default_version=default_version, config=config)
+        self.stats = PoolStats()
+        self._client = None
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.pop('_client', None)
+        state.pop('stats', None)
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.stats = PoolStats()
+        self._client = None
+
+    @property
+    def connection_count(self):
+        return self.stats.connection_count
+
+    @property
+    def pool_hit_count(self):
+        return self.stats.pool_hit_count
+
+    def _trace_config(self):
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params):
+            self.stats.record_request()
+
+        async def on_connection_create_end(session, context, params):
+            self.stats.record_connection()
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        return trace_config
+
+    @property
+    def client(self):
+        if self._client is None or self._client.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.config.get('pool_maxsize', DEFAULT_CONNECTION_LIMIT),
+                limit_per_host=self.config.get('pool_per_host', 0),
+                force_close=not self.config.get('keep_alive', True),
+            )
+            self._client = aiohttp.ClientSession(connector=connector,
+                                                 timeout=_client_timeout(self.config.get('timeout')),
+                                                 trace_configs=[self._trace_config()])
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+        if self._owns_transport:
+            self.transport.close()
+
+    def __enter__(self):
+        raise TypeError("Use 'async with' with AsyncSession")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def json_api_request(self, url, method=None, item_id=None, item_type=None, attributes=None,
+                               raw_body=None, query_parameters=None, fields=None, headers=None, retry=True,
+                               auth=None, embed=None, include=None, raw=False):
+        if fields or embed or include:
+            query_parameters = json_api_parameters(query_parameters, fields=fields, embed=embed, include=include)
+        method, url, request_kwargs = self._prepare_request(
+            url=url, method=method, item_id=item_id, item_type=item_type, attributes=attributes, raw_body=raw_body,
+            query_parameters=query_parameters, headers=headers, auth=auth)
+        if method == 'GET' and self.single_flight is not None:
+            key = '{}:{}'.format(self._request_key(url, request_kwargs), raw)
+            return await self.single_flight.do_async(
+                key, url, lambda: self._get(url, request_kwargs, retry=retry, raw=raw))
+        if method == 'GET':
+            return await self._get(url, request_kwargs, retry=retry, raw=raw)
+        response = await self._send(method=method, url=url, request_kwargs=request_kwargs, retry=retry)
+        result = self._decode(response.content, method=method, url=url, raw=raw)
+        self._invalidate_after_write(url, None if raw else result)
+        return result
+
+    async def _get(self, url, request_kwargs, retry=True, raw=False):
+        if self.cache is not None:
+            return await self._cached_get(url=url, request_kwargs=request_kwargs, retry=retry, raw=raw)
+        response = await self._send(method='GET', url=url, request_kwargs=request_kwargs, retry=retry)
+        return self._decode(response.content, method='GET', url=url, raw=raw)
+
+    async def _cached_get(self, url, request_kwargs, retry=True, raw=False):
+        # Cache lookups stay synchronous: both caches answer from memory or a local SQLite file.
+        key = self._request_key(url, request_kwargs)
+        entry = self.cache.get(key)
+        if entry is not None and entry.is_fresh(self.cache.ttl):
+            self.cache.record('hits')
+            return self._decode(entry.body, method='GET', url=url, raw=raw)
+        response = await self._send(method='GET', url=url,
+                                    request_kwargs=self._conditional_request(entry, request_kwargs), retry=retry)
+        return self._decode(self._cached_body(key, url, entry, response), method='GET', url=url, raw=raw)
+
+    def stream(self, url, method="GET", query_parameters=None, headers=None, retry=True, auth=None, raw_body=None):
+        raise exceptions.UnsupportedMethod("stream is only available on the synchronous Session")
+
+    def batch(self, workers=None):
+        raise exceptions.UnsupportedMethod("batch is only available on the synchronous Session; use asyncio.gather")
+
+    async def _send(self, method, url, request_kwargs, retry=True):
+        client_kwargs = {
+            'params': _query_params(request_kwargs['params']),
+            'headers': {**request_kwargs['headers'], **auth_headers(request_kwargs['auth'], method, url)},
+        }
+        if 'data' in request_kwargs:
+            client_kwargs['data'] = request_kwargs['data']
+        body, body_position, rewindable = self._body_state(request_kwargs)
+        attempt = 0
+
+        while True:
+            self._before_attempt(method, url, attempt, waited=await self._acquire())
+            started = time.perf_counter()
+            try:
+                async with self.client.request(method, url, **client_kwargs) as client_response:
+                    response = _ResponseView(client_response, await client_response.read())
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if self.hooks.active:
+                    self.hooks.emit(instrumentation.AFTER_RESPONSE, method=method, url=url, error=e,
+                                    latency=time.perf_counter() - started, retry_count=attempt)
+                category = self._retry_after_error(method, e, retries.CONNECTION_ERROR, attempt, retry, rewindable)
+                if category is None:
+                    raise
+                await self._wait_before_retry(method, url, category, attempt, body, body_position)
+                attempt += 1
+                continue
+
+            if self.hooks.active:
+                self.hooks.emit(instrumentation.AFTER_RESPONSE, method=method, url=url,
+                                status=response.status_code, bytes=len(response.content),
+                                latency=time.perf_counter() - started, retry_count=attempt)
+            decision = self._check_response(method, response, attempt, retry, rewindable)
+            if decision is None:
+                return response
+            category, retry_after = decision
+            await self._wait_before_retry(method, url, category, attempt, body, body_position,
+                                          retry_after=retry_after)
+            attempt += 1
+
+    async def _acquire(self):
+        waited = 0.0
+        wait_time = self.rate_limiter.try_acquire()
+        while wait_time:
+            await asyncio.sleep(wait_time)
+            waited += wait_time
+            wait_time = self.rate_limiter.try_acquire()
+        if waited:
+            self.rate_limiter.record_wait(waited)
+        return waited
+
+    async def _wait_before_retry(self, method, url, category, attempt, body, body_position, retry_after=None):
+        delay = self._retry_delay(method, url, category, attempt, retry_after=retry_after)
+        if delay:
+            await asyncio.sleep(delay)
+        if body_position is not None:
+            body.seek(body_position)
+
+    async def get(self, url, query_parameters=None, headers=None, retry=True, auth=None, retrieve_all=False,
+                  fields=None, embed=None, include=None, raw=False):
+        if raw and retrieve_all:
+            raise ValueError("retrieve_all needs decoded pages and cannot be combined with raw")
+        response = await self.json_api_request(url=url, method="GET", query_parameters=query_parameters,
+                                               fields=fields, embed=embed, include=include, headers=headers,
+                                               retry=retry, auth=auth, raw=raw)
+        if raw:
+            return response
+        response_data = response['data']
+        if retrieve_all and isinstance(response_data, List) and response['links']['next']:
+            items = list(response_data)
+            included = list(response.get('included') or [])
+            page_urls = self._remaining_page_urls(response)
+            if page_urls and self.page_workers > 1:
+                for page in await self._fetch_pages(page_urls, headers=headers, retry=retry, auth=auth):
+                    items.extend(page['data'])
+                    included.extend(page.get('included') or [])
+            else:
+                while response['links']['next']:
+                    response = await self.json_api_request(url=response['links']['next'], method="GET",
+                                                           headers=headers, retry=retry, auth=auth)
+                    items.extend(response['data'])
+                    included.extend(response.get('included') or [])
+            response = self._listing_document(response, items, included)
+        return response
+
+    async def _fetch_pages(self, page_urls, headers=None, retry=True, auth=None):
+        semaphore = asyncio.Semaphore(self.page_workers)
+
+        async def fetch(page_url):
+            async with semaphore:
+                return await self.json_api_request(url=page_url, method="GET", headers=headers, retry=retry,
+                                                   auth=auth)
+
+        return await asyncio.gather(*[fetch(page_url) for page_url in page_urls])
+
+    async def iter_pages(self, url, query_parameters=None, page_size=None, headers=None, retry=True, auth=None,
+                         prefetch=True):
+        if page_size:
+            query_parameters = {**(query_parameters or {}), 'page[size]': page_size}
+
+        def fetch(page_url, page_query_parameters=None):
+            return self.json_api_request(url=page_url, method="GET", query_parameters=page_query_parameters,
+                                         headers=headers, retry=retry, auth=auth)
+
+        response = await fetch(url, query_parameters)
+        next_page = None
+        try:
+            while response:
+                next_url = self._next_page_url(response)
+                # Keep one page in flight while the caller works through the current one.
+                next_page = asyncio.ensure_future(fetch(next_url)) if next_url and prefetch else None
+                yield response
+                if next_page is not None:
+                    response = await next_page
+                elif next_url:
+                    response = await fetch(next_url)
+                else:
+                    response = None
+        finally:
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
+
+    async def post(self, url, item_type=None, query_parameters=None, attributes=None, headers=None, retry=True,
+                   auth=None, raw_body=None):
+        return await self.json_api_request(url=url, method="POST", item_type=item_type, attributes=attributes,
+                                           query_parameters=query_parameters, headers=headers, retry=retry,
+                                           raw_body=raw_body, auth=auth)
+
+    async def put(self, url, item_id=None, item_type=None, query_parameters=None, attributes=None, headers=None,
+                  retry=True, raw_body=None, auth=None):
+        return await self.json_api_request(url=url, method="PUT", item_id=item_id, item_type=item_type,
+                                           attributes=attributes, query_parameters=query_parameters,
+                                           headers=headers, retry=retry, raw_body=raw_body, auth=auth)
+
+    async def patch(self, url, item_id, item_type, query_parameters=None, attributes=None, headers=None,
+                    retry=True, raw_body=None, auth=None):
+        return await self.json_api_request(url=url, method="PATCH", item_id=item_id, item_type=item_type,
+                                           attributes=attributes, query_parameters=query_parameters,
+                                           headers=headers, retry=retry, raw_body=raw_body, auth=auth)
+
+    async def delete(self, url, item_type, query_parameters=None, attributes=None, headers=None,
+                     retry=True, auth=None):
+        await self.json_api_request(url=url, method="DELETE", item_type=item_type, attributes=attributes,
+                                    query_parameters=query_parameters, headers=headers, retry=retry, auth=auth)
+        return None
@@ -0,0 +1,20 @@
+from ..user import User
+
+
+class AsyncUser(User):
+    async def get(self, query_parameters=None, auth=None):
+        url = '/v2/users/me/'
+        if self.self_link:
+            url = self.self_link
+        elif self.links:
+            url = self.links.self
+        elif self.id:
+            url = '/v2/users/{}/'.format(self.id)
+
+        response = await self.session.get(
+            url=url, query_parameters=query_parameters, auth=auth)
+        if response:
+            self._update(response=response)
+        else:
+            raise ValueError(
+                "No url or id to get. Set the id or self_link then try to get.")
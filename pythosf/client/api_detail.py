@@ -1,4 +1,6 @@
-from ..utils import save_attribute_items, unwrap_data
+from ..utils import unwrap_data
+
+TOP_LEVEL_KEYS = ('relationships', 'links', 'meta')
 
 
 class APIDetail:
@@ -11,26 +13,120 @@ class APIDetail:
         response_data = unwrap_data(response)
 
         if response_data:
-            if 'attributes' in response_data:
-                response_attributes = response_data['attributes']
-            else:
-                response_attributes = response_data
-            save_attribute_items(self, response_attributes=response_attributes)
+            # Attributes, relationships, links and meta are read from the response on first access
+            # rather than copied onto the instance, which keeps large listings cheap to build.
+            instance_data = self.__dict__
+            if len(instance_data) > 1:
+                # Drop values read from the previous document (and overrides of names the new one sets).
+                stale = set(self._attributes_of(response_data)).union(TOP_LEVEL_KEYS)
+                previous = instance_data.get('_data')
+                if previous is not None:
+                    stale.update(self._attributes_of(previous))
+                for key in [key for key in instance_data if key in stale]:
+                    del instance_data[key]
+            self._data = response_data
             self.id = response_data.get('id', None)
-            self.relationships = TopLevelData(
-                response=response, tld_key='relationships')
-            self.links = TopLevelData(response=response, tld_key='links')
-            self.meta = TopLevelData(response=response, tld_key='meta')
+            included = response.get('included') if isinstance(response, dict) else None
+            if included:
+                self._included = {(item['type'], item['id']): item for item in included}
+            if included or 'embeds' in response_data:
+                self._hydrate()
+
+    def _embed_factories(self):
+        # Maps an embedded relationship name to the attribute it is hydrated into and the class to build.
+        return {}
+
+    def _hydrate(self):
+        for name, (attribute, factory) in self._embed_factories().items():
+            embedded = self._embedded(name)
+            if embedded is None:
+                continue
+            if isinstance(embedded, list):
+                value = [factory(session=self.session, data=item) for item in embedded]
+                value = [item for item in value if item is not None]
+            else:
+                value = factory(session=self.session, data=embedded)
+            setattr(self, attribute, value)
+
+    def _embedded(self, name):
+        # OSF returns embeds inline under 'embeds'; JSON:API include puts them in the document's 'included'.
+        data = self.__dict__.get('_data') or {}
+        embed = (data.get('embeds') or {}).get(name)
+        if embed is not None:
+            return embed.get('data')
+        included = self.__dict__.get('_included')
+        linkage = ((data.get('relationships') or {}).get(name) or {}).get('data')
+        if not included or linkage is None:
+            return None
+        if isinstance(linkage, list):
+            return [included[(item['type'], item['id'])] for item in linkage
+                    if (item['type'], item['id']) in included]
+        return included.get((linkage['type'], linkage['id']))
+
+    @staticmethod
+    def _attributes_of(response_data):
+        if 'attributes' in response_data:
+            return response_data['attributes']
+        return response_data
+
+    def __getattr__(self, name):
+        data = self.__dict__.get('_data')
+        if data is None or name.startswith('__'):
+            raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, name))
+        if name in TOP_LEVEL_KEYS:
+            value = TopLevelData(response=data, tld_key=name)
+            self.__dict__[name] = value
+            return value
+        attributes = self._attributes_of(data)
+        if name in attributes:
+            value = attributes[name]
+            # Cached on the instance, so later reads of this name are ordinary attribute lookups.
+            self.__dict__[name] = value
+            return value
+        if name == 'type' and 'type' in data:
+            return data['type']
+        raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, name))
+
+    def __getstate__(self):
+        # TopLevelData views are rebuilt from _data on first access, so they are not pickled.
+        return {key: value for key, value in self.__dict__.items() if not isinstance(value, TopLevelData)}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    def __dir__(self):
+        names = set(super().__dir__())
+        data = self.__dict__.get('_data')
+        if data is not None:
+            names.update(self._attributes_of(data))
+            names.update(TOP_LEVEL_KEYS)
+        return sorted(names)
 
 
 class TopLevelData:
+    __slots__ = ('_tld',)
+
     def __init__(self, response, tld_key):
         self.update(response=response, tld_key=tld_key)
 
     def update(self, response, tld_key):
         tld_data = unwrap_data(response)
-        if tld_data:
-            tld = tld_data.get(tld_key, None)
-            if tld:
-                save_attribute_items(self, response_attributes=tld)
+        tld = tld_data.get(tld_key, None) if tld_data else None
+        object.__setattr__(self, '_tld', tld or {})
+
+    def __getattr__(self, name):
+        if name == '_tld':
+            raise AttributeError(name)
+        try:
+            return self._tld[name]
+        except KeyError:
+            raise AttributeError("'TopLevelData' object has no attribute '{}'".format(name))
+
+    def __setattr__(self, name, value):
+        if name == '_tld':
+            object.__setattr__(self, name, value)
+        else:
+            self._tld[name] = value
 
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | set(self._tld))
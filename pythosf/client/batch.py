@@ -0,0 +1,114 @@
+import itertools
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+DEFAULT_BATCH_WORKERS = 8
+# OSF rejects bulk JSON:API requests with more than 100 resources.
+BULK_LIMIT = 100
+BULK_CONTENT_TYPE = 'application/vnd.api+json; ext=bulk'
+
+
+class BatchResult:
+    def __init__(self, index, value=None, error=None):
+        self.index = index
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.ok:
+            return 'BatchResult({}, value={!r})'.format(self.index, self.value)
+        return 'BatchResult({}, error={!r})'.format(self.index, self.error)
+
+
+def bulk_rejected(error):
+    # Only a 4xx answer proves a bulk request was not applied. After a timeout, a connection error or a 5xx it
+    # may have been, so repeating it item by item could apply it twice. A 429 is left to the retry policy.
+    response = getattr(error, 'response', None)
+    status_code = getattr(response, 'status_code', None)
+    return status_code is not None and 400 <= status_code < 500 and status_code != 429
+
+
+def run_concurrently(calls, workers=DEFAULT_BATCH_WORKERS):
+    def run(indexed_call):
+        index, (function, args, kwargs) = indexed_call
+        try:
+            return BatchResult(index, value=function(*args, **kwargs))
+        except Exception as e:
+            logging.log(logging.ERROR, 'Batch item {} failed: {}'.format(index, e))
+            return BatchResult(index, error=e)
+
+    if not calls:
+        return []
+    with ThreadPoolExecutor(max_workers=min(workers, len(calls))) as executor:
+        return list(executor.map(run, enumerate(calls)))
+
+
+def run_in_processes(function, items, workers=None, ordered=False, max_pending=None):
+    # Sessions and resources pickle to a compact form, so function(item) can run in worker processes. Results
+    # are yielded as they finish (in input order with ordered=True) and at most max_pending items are in flight.
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    items = enumerate(items)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending, ready, next_index = {}, {}, 0
+
+        def fill():
+            # Finished results held back for ordering still count, or one slow item would let the rest run ahead.
+            for index, item in itertools.islice(items, max(max_pending - len(pending) - len(ready), 0)):
+                pending[executor.submit(function, item)] = index
+
+        fill()
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    try:
+                        result = BatchResult(index, value=future.result())
+                    except Exception as e:
+                        logging.log(logging.ERROR, 'Process item {} failed: {}'.format(index, e))
+                        result = BatchResult(index, error=e)
+                    if ordered:
+                        ready[index] = result
+                    else:
+                        yield result
+                while next_index in ready:
+                    yield ready.pop(next_index)
+                    next_index += 1
+                fill()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def chunks(items, size=BULK_LIMIT):
+    for start in range(0, len(items), size):
+        yield start, items[start:start + size]
+
+
+class Batch:
+    def __init__(self, workers=DEFAULT_BATCH_WORKERS):
+        self.workers = workers
+        self.calls = []
+        self.results = None
+
+    def submit(self, function, *args, **kwargs):
+        self.calls.append((function, args, kwargs))
+        return len(self.calls) - 1
+
+    def execute(self):
+        self.results = run_concurrently(self.calls, workers=self.workers)
+        self.calls = []
+        return self.results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.execute()
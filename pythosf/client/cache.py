@@ -0,0 +1,206 @@
+import collections
+import hashlib
+import json
+import threading
+import time
+import urllib.parse
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL = 60
+
+
+def cache_key(url, query_parameters=None, accept=None, auth_key=None):
+    parts = [url, accept or '', auth_key or '']
+    if query_parameters:
+        parts.append(json.dumps(sorted((str(key), str(value)) for key, value in query_parameters.items())))
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def base_url(url):
+    return urllib.parse.urlsplit(url)._replace(query='', fragment='').geturl()
+
+
+def _waterbutler_location(url):
+    # WaterButler URLs look like .../v1/resources/{node}/providers/{provider}{path}.
+    segments = urllib.parse.urlsplit(url).path.split('/')
+    for position in range(len(segments) - 4):
+        if segments[position:position + 2] == ['v1', 'resources'] and segments[position + 3] == 'providers':
+            path = '/' + '/'.join(segments[position + 5:])
+            return segments[position + 2], segments[position + 4], path
+    return None
+
+
+def osf_urls_for_write(api_base_url, url, document=None):
+    # Writes to WaterButler change what OSF reports for the node's file listings and the file itself, so those
+    # OSF URLs are invalidated too. The WaterButler response names the destination of moves and copies.
+    locations = []
+    location = _waterbutler_location(url)
+    if location is not None:
+        locations.append(location)
+    data = document.get('data') if isinstance(document, dict) else None
+    attributes = data.get('attributes') if isinstance(data, dict) else None
+    if attributes and attributes.get('resource') and attributes.get('provider'):
+        locations.append((attributes['resource'], attributes['provider'], attributes.get('path') or '/'))
+    urls = [url]
+    for node, provider, path in locations:
+        urls.append(urllib.parse.urljoin(api_base_url, 'v2/nodes/{}/files/'.format(node)))
+        if provider == 'osfstorage' and path.strip('/'):
+            urls.append(urllib.parse.urljoin(api_base_url, 'v2/files/{}'.format(path.strip('/').split('/')[0])))
+    return list(dict.fromkeys(urls))
+
+
+class CacheEntry:
+    __slots__ = ('url', 'body', 'etag', 'last_modified', 'stored_at')
+
+    def __init__(self, url, body, etag=None, last_modified=None, stored_at=None):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = time.time() if stored_at is None else stored_at
+
+    def is_fresh(self, ttl):
+        return ttl is not None and time.time() - self.stored_at < ttl
+
+    @property
+    def has_validators(self):
+        return bool(self.etag or self.last_modified)
+
+
+class BaseCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._lock = threading.RLock()
+
+    def record(self, outcome):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    @property
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'revalidations': self.revalidations}
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, entry):
+        raise NotImplementedError
+
+    def touch(self, key):
+        raise NotImplementedError
+
+    def invalidate(self, url):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class MemoryCache(BaseCache):
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        super().__init__(max_entries=max_entries, ttl=ttl)
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __reduce__(self):
+        # Cached responses are not copied into other processes; each starts with an empty cache.
+        return type(self), (self.max_entries, self.ttl)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def touch(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.stored_at = time.time()
+
+    def invalidate(self, url):
+        url = base_url(url)
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if base_url(entry.url).startswith(url)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        super().__init__(max_entries=max_entries, ttl=ttl)
+        self.path = path
+        # Imported here so that sessions using the memory cache do not load sqlite3 at startup.
+        import sqlite3
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, url TEXT, base_url TEXT, body BLOB, etag TEXT, last_modified TEXT, '
+                'stored_at REAL, accessed_at REAL)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS responses_base_url ON responses (base_url)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)')
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def __reduce__(self):
+        return type(self), (self.path, self.max_entries, self.ttl)
+
+    def get(self, key):
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                'SELECT url, body, etag, last_modified, stored_at FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self._connection.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (time.time(), key))
+        url, body, etag, last_modified, stored_at = row
+        return CacheEntry(url=url, body=bytes(body), etag=etag, last_modified=last_modified, stored_at=stored_at)
+
+    def set(self, key, entry):
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, entry.url, base_url(entry.url), entry.body, entry.etag, entry.last_modified, entry.stored_at,
+                 time.time()))
+            self._connection.execute(
+                'DELETE FROM responses WHERE key IN ('
+                'SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
+
+    def touch(self, key):
+        with self._lock, self._connection:
+            now = time.time()
+            self._connection.execute(
+                'UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?', (now, now, key))
+
+    def invalidate(self, url):
+        prefix = base_url(url)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM responses WHERE substr(base_url, 1, ?) = ?", (len(prefix), prefix))
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM responses')
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,218 @@
+import datetime
+import logging
+from .index import MetadataIndex, index_path, parent_path
+from .walker import DEFAULT_WALK_WORKERS
+
+ADDED = 'added'
+MODIFIED = 'modified'
+DELETED = 'deleted'
+
+# Node log actions that touch files are '<addon>_<suffix>', e.g. 'osf_storage_file_added' or
+# 'github_file_updated'; the provider is named by the prefix. Moves and renames remove the source and add the
+# destination.
+CHANGE_SUFFIXES = ('_file_added', '_file_updated')
+CREATE_FOLDER_SUFFIXES = ('_folder_created',)
+REMOVE_SUFFIXES = ('_file_removed',)
+MOVE_ACTIONS = {'addon_file_moved', 'addon_file_renamed'}
+COPY_ACTION = 'addon_file_copied'
+# Log prefixes that differ from the provider name used in file paths.
+PROVIDER_PREFIXES = {'osf_storage': 'osfstorage'}
+LOG_PAGE_SIZE = 100
+
+
+class ChangeEvent:
+    def __init__(self, kind, provider, path, item=None):
+        self.kind = kind
+        self.provider = provider
+        self.path = path
+        self.item = item
+
+    def __repr__(self):
+        return 'ChangeEvent({!r}, {!r}, {!r})'.format(self.kind, self.provider, self.path)
+
+
+def _action_provider(action, suffixes):
+    for suffix in suffixes:
+        if action.endswith(suffix) and len(action) > len(suffix):
+            prefix = action[:-len(suffix)]
+            return PROVIDER_PREFIXES.get(prefix, prefix)
+    return None
+
+
+def _log_locations(action, params):
+    # Returns (removed, changed_folder, created_folder) locations as (provider, materialized path) pairs.
+    if action in MOVE_ACTIONS or action == COPY_ACTION:
+        source, destination = params.get('source') or {}, params.get('destination') or {}
+        removed = None
+        if action in MOVE_ACTIONS:
+            removed = (source.get('provider'), source.get('materialized'))
+        destination_path = destination.get('materialized')
+        if destination_path and destination_path.endswith('/'):
+            return removed, None, (destination.get('provider'), destination_path)
+        return removed, (destination.get('provider'), parent_path(destination_path or '/')), None
+    path = params.get('path')
+    if not path:
+        return None, None, None
+    provider = _action_provider(action, REMOVE_SUFFIXES)
+    if provider:
+        return (provider, path), None, None
+    provider = _action_provider(action, CREATE_FOLDER_SUFFIXES)
+    if provider:
+        return None, None, (provider, path)
+    provider = _action_provider(action, CHANGE_SUFFIXES)
+    if provider:
+        return None, (provider, parent_path(path)), None
+    return None, None, None
+
+
+def _collapse(events):
+    # A file inside a new folder can be reached both by the folder's crawl and by its own log entry.
+    latest, collapsed = {}, []
+    for event in events:
+        key = (event.provider, event.path)
+        previous = latest.get(key)
+        if previous is not None and (previous.kind == event.kind or (previous.kind, event.kind) == (ADDED, MODIFIED)):
+            continue
+        latest[key] = event
+        collapsed.append(event)
+    return collapsed
+
+
+class ChangeFeed:
+    # Reports files added, modified and deleted in a node since the previous poll. Node logs newer than the
+    # stored watermark say which folders changed; only those folders are listed, filtered on date_modified, so
+    # a poll costs requests in proportion to the changes rather than to the size of the project. The watermark
+    # and the file index live in the MetadataIndex, so a file-backed index carries state between processes.
+    def __init__(self, node, index=None, workers=DEFAULT_WALK_WORKERS, auth=None):
+        self.node = node
+        self.index = index if index is not None else MetadataIndex(session=node.session)
+        if self.index.session is None:
+            self.index.session = node.session
+        self.workers = workers
+        self.auth = auth
+
+    @property
+    def cursor_key(self):
+        return 'changes:{}'.format(self.node.id)
+
+    @property
+    def watermark(self):
+        return self.index.get_cursor(self.cursor_key)
+
+    def _logs_url(self):
+        return '/v2/nodes/{}/logs/'.format(self.node.id)
+
+    def poll(self):
+        watermark = self.watermark
+        if watermark is None:
+            return self._baseline()
+        return self._changes_since(watermark)
+
+    def _baseline(self):
+        # The first poll indexes everything and reports every file as added.
+        response = self.node.session.get(url=self._logs_url(), query_parameters={'page[size]': 1}, auth=self.auth)
+        logs = response['data'] if response else []
+        newest = logs[0]['attributes']['date'] if logs else (
+            datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None).isoformat())
+        events = []
+        for provider in self.node.iter_providers(auth=self.auth):
+            self.index.crawl(provider, workers=self.workers, auth=self.auth)
+            files = self.index.prefix('/', node=self.node.id, provider=provider.provider)
+            events.extend(self._file_events(ADDED, files))
+        self.index.set_cursor(self.cursor_key, newest)
+        return events
+
+    def _changes_since(self, watermark):
+        removed, changed, created = [], set(), set()
+        newest = watermark
+        pages = self.node.session.iter_pages(url=self._logs_url(), query_parameters={'filter[date][gt]': watermark},
+                                             page_size=LOG_PAGE_SIZE, auth=self.auth)
+        for page in pages:
+            for log in page['data']:
+                attributes = log['attributes']
+                newest = max(newest, attributes['date'])
+                removed_location, changed_folder, created_folder = _log_locations(
+                    attributes['action'], attributes.get('params') or {})
+                if removed_location and removed_location[1]:
+                    removed.append(removed_location)
+                if changed_folder:
+                    changed.add(changed_folder)
+                if created_folder:
+                    created.add((created_folder[0], parent_path(created_folder[1]) or '/'))
+
+        events = []
+        for provider, path in removed:
+            events.extend(self._remove(provider, path))
+        for provider, folder_path in sorted(created, key=lambda location: location[1].count('/')):
+            events.extend(self._relist(provider, folder_path))
+        for provider, folder_path in sorted(changed - created, key=lambda location: location[1].count('/')):
+            events.extend(self._list_changed(provider, folder_path, watermark))
+        self.index.set_cursor(self.cursor_key, newest)
+        return _collapse(events)
+
+    def _file_events(self, kind, items):
+        return [ChangeEvent(kind, item.provider, index_path(item), item) for item in items
+                if getattr(item, 'kind', None) == 'file']
+
+    def _remove(self, provider, path):
+        items = self.index.prefix(path, node=self.node.id, provider=provider) if path.endswith('/') else [
+            item for item in [self.index.lookup(path, node=self.node.id, provider=provider)] if item is not None]
+        for item in items:
+            self.index.remove(item, node=self.node.id)
+        return self._file_events(DELETED, items)
+
+    def _indexed_folder(self, provider, folder_path):
+        # A folder the index has not seen yet is picked up by listing its closest indexed ancestor.
+        while folder_path:
+            folder = self.index.lookup(folder_path, node=self.node.id, provider=provider)
+            if folder is not None:
+                return folder, folder_path
+            folder_path = parent_path(folder_path)
+        return None, None
+
+    def _list_changed(self, provider, folder_path, watermark):
+        folder, indexed_path = self._indexed_folder(provider, folder_path)
+        if folder is None:
+            logging.log(logging.WARNING, 'No indexed folder for {} {}; skipping'.format(provider, folder_path))
+            return []
+        if indexed_path != folder_path:
+            return self._relist(folder.provider, indexed_path)
+        changed = list(folder.iter_files(auth=self.auth, query_parameters={'filter[date_modified][gt]': watermark},
+                                         prefetch=False))
+        events = []
+        for item in changed:
+            known = self.index.lookup(index_path(item), node=self.node.id, provider=folder.provider)
+            if getattr(item, 'kind', None) == 'file':
+                events.append(ChangeEvent(MODIFIED if known is not None else ADDED, folder.provider,
+                                          index_path(item), item))
+        self.index.add_listing(folder, changed, complete=False)
+        return events
+
+    def _relist(self, provider, folder_path):
+        folder, folder_path = self._indexed_folder(provider, folder_path)
+        if folder is None:
+            logging.log(logging.WARNING, 'No indexed folder for {} {}; skipping'.format(provider, folder_path))
+            return []
+        provider = folder.provider
+        children = self.index.children(folder_path, node=self.node.id, provider=provider)
+        before = {index_path(item): item for item in children}
+        items = list(folder.iter_files(auth=self.auth, prefetch=False))
+        events, new_folders = [], []
+        for item in items:
+            known = before.pop(index_path(item), None)
+            if getattr(item, 'kind', None) == 'folder':
+                if known is None:
+                    new_folders.append(item)
+            elif known is None:
+                events.append(ChangeEvent(ADDED, provider, index_path(item), item))
+            elif (getattr(known, 'date_modified', None), getattr(known, 'size', None)) != (
+                    getattr(item, 'date_modified', None), getattr(item, 'size', None)):
+                events.append(ChangeEvent(MODIFIED, provider, index_path(item), item))
+        for path in before:
+            events.extend(self._remove(provider, path))
+        self.index.add_listing(folder, items, complete=True)
+        for new_folder in new_folders:
+            self.index.crawl(new_folder, workers=self.workers, auth=self.auth)
+            files = self.index.prefix(index_path(new_folder), node=self.node.id, provider=provider)
+            events.extend(self._file_events(ADDED, files))
+        return events
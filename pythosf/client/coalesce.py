@@ -0,0 +1,119 @@
+import threading
+from .instrumentation import endpoint_template
+
+
+class CoalesceStats:
+    __slots__ = ('requests', 'coalesced')
+
+    def __init__(self):
+        self.requests = 0
+        self.coalesced = 0
+
+    def __repr__(self):
+        return 'CoalesceStats(requests={}, coalesced={})'.format(self.requests, self.coalesced)
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    # While a call for a key is running, callers asking for the same key wait for it and get the same result
+    # (or exception) instead of repeating the work. Counts are kept per endpoint template (ids and paths
+    # collapsed) so a long-running process serving many users and files keeps a bounded set of them.
+    def __init__(self):
+        self.stats = {}
+        self._calls = {}
+        self._async_calls = {}
+        self._lock = threading.Lock()
+
+    def __reduce__(self):
+        return type(self), ()
+
+    def _record(self, url, leader):
+        endpoint = endpoint_template(url)
+        stats = self.stats.get(endpoint)
+        if stats is None:
+            stats = self.stats[endpoint] = CoalesceStats()
+        if leader:
+            stats.requests += 1
+        else:
+            stats.coalesced += 1
+
+    def do(self, key, url, function):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self._record(url, leader)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def do_async(self, key, url, function):
+        # The asyncio form of do: function returns a coroutine and waiters share one future. Futures belong to
+        # an event loop, so calls are only shared between callers on the same loop.
+        import asyncio
+        loop = asyncio.get_running_loop()
+        call_key = (loop, key)
+        with self._lock:
+            future = self._async_calls.get(call_key)
+            leader = future is None
+            if leader:
+                future = self._async_calls[call_key] = loop.create_future()
+            self._record(url, leader)
+
+        if not leader:
+            # A cancelled waiter must not cancel the call the others are still waiting on.
+            return await asyncio.shield(future)
+
+        try:
+            result = await function()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved so it is not reported again when there were no waiters.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                del self._async_calls[call_key]
+        return result
+
+    def summary(self):
+        with self._lock:
+            return {endpoint: {'requests': stats.requests, 'coalesced': stats.coalesced}
+                    for endpoint, stats in self.stats.items()}
+
+    @property
+    def coalesced(self):
+        with self._lock:
+            return sum(stats.coalesced for stats in self.stats.values())
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {}
@@ -0,0 +1,70 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class JSONCodec:
+    name = 'json'
+
+    def loads(self, content):
+        if isinstance(content, memoryview):
+            content = content.tobytes()
+        return json.loads(content)
+
+    def dumps(self, value):
+        return json.dumps(value)
+
+    def __repr__(self):
+        return '{}()'.format(type(self).__name__)
+
+
+class OrjsonCodec(JSONCodec):
+    name = 'orjson'
+
+    def loads(self, content):
+        # orjson reads bytes, bytearray and memoryview directly, without decoding to str first.
+        return orjson.loads(content)
+
+    def dumps(self, value):
+        return orjson.dumps(value)
+
+
+class UjsonCodec(JSONCodec):
+    name = 'ujson'
+
+    def loads(self, content):
+        if isinstance(content, memoryview):
+            content = content.tobytes()
+        return ujson.loads(content)
+
+    def dumps(self, value):
+        return ujson.dumps(value, ensure_ascii=False, escape_forward_slashes=False)
+
+
+CODECS = {'json': JSONCodec}
+if orjson is not None:
+    CODECS['orjson'] = OrjsonCodec
+if ujson is not None:
+    CODECS['ujson'] = UjsonCodec
+
+
+def get_codec(codec=None):
+    # codec is a codec instance, one of the CODECS names, or None/'auto' for the fastest one installed.
+    if codec is None or codec == 'auto':
+        for name in ('orjson', 'ujson', 'json'):
+            if name in CODECS:
+                return CODECS[name]()
+    if isinstance(codec, str):
+        if codec not in CODECS:
+            raise ValueError("JSON codec {} is not available; installed codecs are {}".format(
+                codec, ', '.join(sorted(CODECS))))
+        return CODECS[codec]()
+    return codec
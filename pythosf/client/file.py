@@ -1,5 +1,7 @@
-import json
+import os
 from .api_detail import APIDetail
+from .ranged import DEFAULT_RANGE_SIZE, DEFAULT_RANGE_WORKERS, RangedDownload
+from ..utils import DEFAULT_CHUNK_SIZE, new_hashers, upload_body, verify_hashes
 
 
 class File(APIDetail):
@@ -14,19 +16,21 @@ class File(APIDetail):
             self.node = node
             self.session = session
 
-    def _update_from_wb(self, wb_data, auth=None):
-        auth = auth or self.session.auth
+    def _osf_url_from_wb(self, wb_data):
         wb_attributes = wb_data['data']['attributes']
         if wb_attributes['provider'] == 'osfstorage':
-            osf_url = "{}v2/files{}".format(self.session.api_base_url,
-                                            wb_attributes['path'])
-        else:
-            osf_url = "{}v2/nodes/{}/files/{}{}?info".format(
-                self.session.api_base_url,
-                wb_attributes['resource'],
-                wb_attributes['provider'],
-                wb_attributes['path']
-            )
+            return "{}v2/files{}".format(self.session.api_base_url,
+                                         wb_attributes['path'])
+        return "{}v2/nodes/{}/files/{}{}?info".format(
+            self.session.api_base_url,
+            wb_attributes['resource'],
+            wb_attributes['provider'],
+            wb_attributes['path']
+        )
+
+    def _update_from_wb(self, wb_data, auth=None):
+        auth = auth or self.session.auth
+        osf_url = self._osf_url_from_wb(wb_data=wb_data)
         response = self.session.get(url=osf_url, auth=auth)
         self._update(response=response)
 
@@ -41,9 +45,61 @@ class File(APIDetail):
             url=self.location, query_parameters=query_parameters, auth=auth)
         self._update(response=response)
 
-    def download(self, query_parameters=None, auth=None):
-        url = self.links.download
-        return self.session.get(url=url, query_parameters=query_parameters, auth=auth)
+    @property
+    def hashes(self):
+        extra = getattr(self, 'extra', None) or {}
+        return {name: value for name, value in (extra.get('hashes') or {}).items() if value}
+
+    def download(self, to=None, chunk_size=DEFAULT_CHUNK_SIZE, resume=False, verify=True, query_parameters=None,
+                 auth=None):
+        if to is None:
+            response = self.session.stream(url=self.links.download, query_parameters=query_parameters, auth=auth)
+            with response:
+                return response.content
+        if isinstance(to, (str, os.PathLike)):
+            mode = 'ab' if resume and os.path.exists(to) else 'wb'
+            with open(to, mode) as file_object:
+                self._download_to(file_object, chunk_size=chunk_size, resume=resume, verify=verify,
+                                  query_parameters=query_parameters, auth=auth)
+        else:
+            self._download_to(to, chunk_size=chunk_size, resume=False, verify=verify,
+                              query_parameters=query_parameters, auth=auth)
+        return to
+
+    def download_ranges(self, to, workers=DEFAULT_RANGE_WORKERS, range_size=DEFAULT_RANGE_SIZE, verify=True,
+                        query_parameters=None, stats=None, auth=None):
+        # Parallel download for large files; call it again with the same arguments to resume after a failure.
+        download = RangedDownload(self, to, workers=workers, range_size=range_size, verify=verify,
+                                  query_parameters=query_parameters, auth=auth, stats=stats)
+        return download.run()
+
+    def _download_to(self, file_object, chunk_size, resume, verify, query_parameters=None, auth=None):
+        expected_hashes = self.hashes if verify else {}
+        hashers = new_hashers(expected_hashes)
+        offset = file_object.tell() if resume else 0
+        expected_size = getattr(self, 'size', None)
+        if offset:
+            # Hash what is already on disk so verification covers the whole file after resuming.
+            with open(file_object.name, 'rb') as existing:
+                for chunk in iter(lambda: existing.read(chunk_size), b''):
+                    for hasher in hashers.values():
+                        hasher.update(chunk)
+
+        if not (offset and expected_size is not None and offset >= expected_size):
+            headers = {'Range': 'bytes={}-'.format(offset)} if offset else None
+            response = self.session.stream(url=self.links.download, query_parameters=query_parameters,
+                                           headers=headers, auth=auth)
+            with response:
+                if offset and response.status_code != 206:
+                    # The server ignored the range, so start over.
+                    file_object.seek(0)
+                    file_object.truncate()
+                    hashers = new_hashers(expected_hashes)
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    file_object.write(chunk)
+                    for hasher in hashers.values():
+                        hasher.update(chunk)
+        verify_hashes(hashers, expected_hashes)
 
     def upload(self, data, query_parameters=None, auth=None):
         url = self.links.upload
@@ -53,9 +109,10 @@ class File(APIDetail):
         }
         combined_query_parameters = {
             **query_parameters, **upload_query_parameters}
-        return self.session.put(url=url, query_parameters=combined_query_parameters, raw_body=data, auth=auth)
+        return self.session.put(url=url, query_parameters=combined_query_parameters, raw_body=upload_body(data),
+                                auth=auth)
 
-    def _move_or_copy(self, to_folder, action, rename=None, conflict=None, query_parameters=None, auth=None):
+    def _move_or_copy_body(self, to_folder, action, rename=None, conflict=None):
         body = {
             'action': action,
             'path': to_folder.path,
@@ -66,19 +123,28 @@ class File(APIDetail):
             body['rename'] = rename
         if conflict:
             body['conflict'] = conflict
-        raw_body = json.JSONEncoder().encode(body)
+        return self.session.codec.dumps(body)
+
+    def _move_or_copy(self, to_folder, action, rename=None, conflict=None, query_parameters=None, auth=None):
+        raw_body = self._move_or_copy_body(to_folder=to_folder, action=action, rename=rename, conflict=conflict)
         url = self.links.move
         return self.session.post(url=url, raw_body=raw_body, query_parameters=query_parameters, auth=auth)
 
-    def move(self, to_folder, rename=None, conflict=None, query_parameters=None, auth=None):
+    def move(self, to_folder, rename=None, conflict=None, query_parameters=None, auth=None, refresh=True):
+        # With refresh=False the file keeps WaterButler's metadata instead of refetching it from OSF.
         moved_file = self._move_or_copy(to_folder=to_folder, action='move', rename=rename, conflict=conflict,
                                         query_parameters=query_parameters, auth=auth)
-        self._update_from_wb(wb_data=moved_file, auth=auth)
+        if refresh:
+            self._update_from_wb(wb_data=moved_file, auth=auth)
+        else:
+            self._update(response=moved_file)
 
-    def copy(self, to_folder, rename=None, conflict=None, query_parameters=None, auth=None):
+    def copy(self, to_folder, rename=None, conflict=None, query_parameters=None, auth=None, refresh=True):
         new_file = self._move_or_copy(to_folder=to_folder, action='copy', rename=rename, conflict=conflict,
                                       query_parameters=query_parameters, auth=auth)
-        return File(session=self.session, wb_data=new_file, auth=auth)
+        if refresh:
+            return File(session=self.session, wb_data=new_file, auth=auth)
+        return File(session=self.session, data=new_file)
 
     def delete(self, query_parameters=None, auth=None):
         url = self.links.delete
@@ -89,7 +155,7 @@ class File(APIDetail):
             'action': 'rename',
             'rename': name
         }
-        raw_body = json.JSONEncoder().encode(body)
+        raw_body = self.session.codec.dumps(body)
         url = self.links.move
         response = self.session.post(
             url=url, raw_body=raw_body, query_parameters=query_parameters, auth=auth)
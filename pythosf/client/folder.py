@@ -1,5 +1,26 @@
 from .. import exceptions
-from . import File
+from ..utils import unwrap_data, upload_body
+from .file import File
+from .walker import DEFAULT_WALK_WORKERS, Walker
+
+
+def file_or_folder(session, data):
+    file_kind = unwrap_data(data)['attributes']['kind']
+    if file_kind == 'file':
+        return File(session=session, data=data)
+    elif file_kind == 'folder':
+        return Folder(session=session, data=data)
+    return None
+
+
+def listing_fields(fields):
+    # Listings are turned into File or Folder objects by 'kind', so a sparse fieldset must always include it.
+    if not fields or 'files' not in fields:
+        return fields
+    names = fields['files'].split(',') if isinstance(fields['files'], str) else list(fields['files'])
+    if 'kind' not in names:
+        names.append('kind')
+    return {**fields, 'files': names}
 
 
 class Folder(File):
@@ -9,22 +30,52 @@ class Folder(File):
         self.type = "files"
         self.files = []
 
-    def get(self, auth=None, append=False, query_parameters=None, retrieve_all=False):
+    def get(self, auth=None, append=False, query_parameters=None, retrieve_all=False, fields=None, embed=None,
+            include=None):
         url = self.relationships.files['links']['related']['href']
         response = self.session.get(
-            url=url, auth=auth, retrieve_all=retrieve_all, query_parameters=query_parameters)
+            url=url, auth=auth, retrieve_all=retrieve_all, query_parameters=query_parameters,
+            fields=listing_fields(fields), embed=embed, include=include)
         if response:
             files = response['data']
+            included = response.get('included')
             if not append:
                 self.files = []
+            items = []
             for file in files:
-                file_kind = file['attributes']['kind']
-                if file_kind == 'file':
-                    self.files.append(File(session=self.session, data=file))
-                elif file_kind == 'folder':
-                    self.files.append(Folder(session=self.session, data=file))
+                item = file_or_folder(session=self.session, data={'data': file, 'included': included}
+                                      if included else file)
+                if item is not None:
+                    items.append(item)
+            self.files.extend(items)
+            index = getattr(self.session, 'index', None)
+            if index is not None and not fields:
+                # Only a complete, fresh listing shows which children have gone away.
+                complete = not append and (retrieve_all or not (response.get('links') or {}).get('next'))
+                index.add_listing(self, items, complete=complete)
+
+    def iter_files(self, auth=None, query_parameters=None, page_size=None, prefetch=True):
+        url = self.relationships.files['links']['related']['href']
+        pages = self.session.iter_pages(url=url, query_parameters=query_parameters, page_size=page_size,
+                                        auth=auth, prefetch=prefetch)
+        for page in pages:
+            for file in page['data']:
+                item = file_or_folder(session=self.session, data=file)
+                if item is not None:
+                    yield item
+
+    def walk(self, workers=DEFAULT_WALK_WORKERS, max_depth=None, include=None, exclude=None, page_size=None,
+             stats=None, auth=None):
+        walker = Walker(workers=workers, max_depth=max_depth, include=include, exclude=exclude,
+                        page_size=page_size, stats=stats, auth=auth)
+        root_path = getattr(self, 'materialized_path', None) or '/'
+        return walker.walk(roots=[(root_path, self)])
+
+    def download(self, to=None, chunk_size=None, resume=False, verify=True, query_parameters=None, auth=None):
+        raise exceptions.UnsupportedMethod("Cannot download a folder")
 
-    def download(self, query_parameters=None, auth=None):
+    def download_ranges(self, to, workers=None, range_size=None, verify=True, query_parameters=None, stats=None,
+                        auth=None):
         raise exceptions.UnsupportedMethod("Cannot download a folder")
 
     def list(
@@ -63,5 +114,5 @@ class Folder(File):
         combined_query_parameters = {
             **query_parameters, **upload_query_parameters}
         new_file_data = self.session.put(
-            url=url, query_parameters=combined_query_parameters, raw_data=data, auth=auth)
-        return File(session=self.session, wb_data=new_file_data)
+            url=url, query_parameters=combined_query_parameters, raw_body=upload_body(data), auth=auth)
+        return File(session=self.session, wb_data=new_file_data, auth=auth)
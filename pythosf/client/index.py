@@ -0,0 +1,227 @@
+import json
+import sqlite3
+import threading
+import time
+import urllib.parse
+from .folder import file_or_folder
+from .walker import DEFAULT_WALK_WORKERS, WalkStats, Walker
+
+COLUMNS = ('node', 'provider', 'path', 'parent', 'id', 'name', 'kind', 'size', 'date_modified', 'data')
+
+
+def _node_id_from_href(href):
+    segments = [segment for segment in urllib.parse.urlsplit(href or '').path.split('/') if segment]
+    if 'nodes' in segments[:-1]:
+        return segments[segments.index('nodes') + 1]
+    return None
+
+
+def node_id_of(item):
+    # Files and folders carry a node (or, on newer API versions, target) relationship; providers from
+    # /v2/nodes/{id}/files/ only have the id as their 'node' attribute and in their files link.
+    relationships = getattr(item, 'relationships', None)
+    for name in ('node', 'target'):
+        relationship = getattr(relationships, name, None) or {}
+        data = relationship.get('data') or {}
+        if data.get('id'):
+            return data['id']
+        node_id = _node_id_from_href(((relationship.get('links') or {}).get('related') or {}).get('href'))
+        if node_id:
+            return node_id
+    node = getattr(item, 'node', None)
+    if isinstance(node, str) and node:
+        return node
+    if getattr(node, 'id', None):
+        return node.id
+    files = getattr(relationships, 'files', None) or {}
+    return _node_id_from_href(((files.get('links') or {}).get('related') or {}).get('href'))
+
+
+def index_path(item):
+    return getattr(item, 'materialized_path', None) or getattr(item, 'path', None) or '/'
+
+
+def parent_path(path):
+    if path == '/':
+        return None
+    return path.rstrip('/').rpartition('/')[0] + '/'
+
+
+class RefreshStats(WalkStats):
+    def __init__(self):
+        super().__init__()
+        self.skipped = 0
+
+    @property
+    def listed(self):
+        return sum(level.folders for level in self.levels.values())
+
+
+class _RefreshWalker(Walker):
+    # Descends only into folders whose date_modified differs from when the index last listed them.
+    def __init__(self, index, **kwargs):
+        super().__init__(index=index, **kwargs)
+
+    def _should_descend(self, item, depth):
+        if not super()._should_descend(item, depth):
+            return False
+        modified = getattr(item, 'date_modified', None)
+        if modified and modified == self.index.listed_modified(item):
+            with self.stats._lock:
+                self.stats.skipped += 1
+            return False
+        return True
+
+
+class MetadataIndex:
+    # A local SQLite index of file metadata keyed by (node, provider, materialized path). Pass it to a Session
+    # as config['index'] and complete folder listings and walks keep it up to date.
+    def __init__(self, path=':memory:', session=None):
+        self.path = path
+        self.session = session
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.RLock()
+        with self._lock, self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'node TEXT NOT NULL, provider TEXT NOT NULL, path TEXT NOT NULL, parent TEXT, id TEXT, name TEXT, '
+                'kind TEXT, size INTEGER, date_modified TEXT, data TEXT, listed_modified TEXT, listed_at REAL, '
+                'PRIMARY KEY (node, provider, path))')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS entries_id ON entries (id)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS entries_path ON entries (path)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS entries_parent ON entries (node, provider, parent)')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS cursors (key TEXT PRIMARY KEY, value TEXT)')
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def __reduce__(self):
+        # Reopens the same database file in the receiving process; an in-memory index starts out empty.
+        return type(self), (self.path,)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    @staticmethod
+    def _row(item, node, provider):
+        path = index_path(item)
+        return (node, provider, path, parent_path(path), getattr(item, 'id', None), getattr(item, 'name', None),
+                getattr(item, 'kind', None), getattr(item, 'size', None), getattr(item, 'date_modified', None),
+                json.dumps(item._data))
+
+    def _upsert(self, rows):
+        self._connection.executemany(
+            'INSERT INTO entries ({}) VALUES ({}) ON CONFLICT (node, provider, path) DO UPDATE SET {}'.format(
+                ', '.join(COLUMNS), ', '.join('?' * len(COLUMNS)),
+                ', '.join('{0} = excluded.{0}'.format(column) for column in COLUMNS[3:])), rows)
+
+    def add(self, item, node=None, provider=None):
+        node = node or node_id_of(item)
+        provider = provider or getattr(item, 'provider', None)
+        with self._lock, self._connection:
+            self._upsert([self._row(item, node, provider)])
+
+    def add_listing(self, folder, items, complete=True):
+        # A complete listing also records when the folder was listed and drops children that have disappeared.
+        node, provider, folder_path = node_id_of(folder), folder.provider, index_path(folder)
+        rows = [self._row(item, node, provider) for item in items]
+        with self._lock, self._connection:
+            self._upsert([self._row(folder, node, provider)] + rows)
+            if not complete:
+                return
+            self._connection.execute(
+                'UPDATE entries SET listed_modified = ?, listed_at = ? WHERE node = ? AND provider = ? AND path = ?',
+                (getattr(folder, 'date_modified', None), time.time(), node, provider, folder_path))
+            present = {row[2] for row in rows}
+            removed = [path for (path,) in self._connection.execute(
+                'SELECT path FROM entries WHERE node = ? AND provider = ? AND parent = ?',
+                (node, provider, folder_path)) if path not in present]
+            for path in removed:
+                self._delete_tree(node, provider, path)
+
+    def _delete_tree(self, node, provider, path):
+        self._connection.execute(
+            'DELETE FROM entries WHERE node = ? AND provider = ? AND (path = ? OR substr(path, 1, ?) = ?)',
+            (node, provider, path, len(path), path if path.endswith('/') else path + '/'))
+
+    def remove(self, item, node=None, provider=None):
+        with self._lock, self._connection:
+            self._delete_tree(node or node_id_of(item), provider or getattr(item, 'provider', None),
+                              index_path(item))
+
+    def get_cursor(self, key):
+        with self._lock:
+            row = self._connection.execute('SELECT value FROM cursors WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_cursor(self, key, value):
+        with self._lock, self._connection:
+            self._connection.execute('INSERT OR REPLACE INTO cursors VALUES (?, ?)', (key, value))
+
+    def listed_modified(self, folder):
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT listed_modified FROM entries WHERE node = ? AND provider = ? AND path = ?',
+                (node_id_of(folder), folder.provider, index_path(folder))).fetchone()
+        return row[0] if row else None
+
+    def _items(self, query, parameters, session=None):
+        session = session or self.session
+        with self._lock:
+            rows = self._connection.execute(query, parameters).fetchall()
+        return [file_or_folder(session=session, data=json.loads(data)) for (data,) in rows]
+
+    @staticmethod
+    def _scope(node, provider):
+        clauses, parameters = [], []
+        if node is not None:
+            clauses.append('node = ?')
+            parameters.append(node)
+        if provider is not None:
+            clauses.append('provider = ?')
+            parameters.append(provider)
+        return clauses, parameters
+
+    def lookup(self, path, node=None, provider=None, session=None):
+        clauses, parameters = self._scope(node, provider)
+        items = self._items('SELECT data FROM entries WHERE {} LIMIT 1'.format(' AND '.join(clauses + ['path = ?'])),
+                            parameters + [path], session=session)
+        return items[0] if items else None
+
+    def by_id(self, id, session=None):
+        items = self._items('SELECT data FROM entries WHERE id = ? LIMIT 1', (id,), session=session)
+        return items[0] if items else None
+
+    def prefix(self, prefix, node=None, provider=None, session=None):
+        clauses, parameters = self._scope(node, provider)
+        clauses.append('substr(path, 1, ?) = ?')
+        return self._items('SELECT data FROM entries WHERE {} ORDER BY path'.format(' AND '.join(clauses)),
+                           parameters + [len(prefix), prefix], session=session)
+
+    def children(self, path, node=None, provider=None, session=None):
+        clauses, parameters = self._scope(node, provider)
+        clauses.append('parent = ?')
+        return self._items('SELECT data FROM entries WHERE {} ORDER BY path'.format(' AND '.join(clauses)),
+                           parameters + [path], session=session)
+
+    def glob(self, pattern, node=None, provider=None, session=None):
+        # SQLite GLOB is case sensitive and its '*' also matches '/', so '/data/*.csv' searches the whole subtree.
+        clauses, parameters = self._scope(node, provider)
+        clauses.append('path GLOB ?')
+        return self._items('SELECT data FROM entries WHERE {} ORDER BY path'.format(' AND '.join(clauses)),
+                           parameters + [pattern], session=session)
+
+    def crawl(self, folder, workers=DEFAULT_WALK_WORKERS, page_size=None, auth=None):
+        walker = Walker(workers=workers, page_size=page_size, auth=auth, index=self)
+        for _ in walker.walk(roots=[(index_path(folder), folder)]):
+            pass
+        return walker.stats
+
+    def refresh(self, folder, workers=DEFAULT_WALK_WORKERS, page_size=None, auth=None):
+        # Folders without a date_modified (osfstorage reports none) cannot be proven unchanged and are re-listed.
+        walker = _RefreshWalker(index=self, workers=workers, page_size=page_size, auth=auth, stats=RefreshStats())
+        for _ in walker.walk(roots=[(index_path(folder), folder)]):
+            pass
+        return walker.stats
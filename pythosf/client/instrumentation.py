@@ -0,0 +1,277 @@
+import bisect
+import random
+import re
+import threading
+import time
+import urllib.parse
+
+BEFORE_REQUEST = 'before_request'
+AFTER_RESPONSE = 'after_response'
+RETRY = 'retry'
+THROTTLE_SLEEP = 'throttle_sleep'
+DECODE = 'decode'
+EVENTS = (BEFORE_REQUEST, AFTER_RESPONSE, RETRY, THROTTLE_SLEEP, DECODE)
+
+# Path segments that are followed by a resource id in OSF and WaterButler URLs.
+ID_COLLECTIONS = {
+    'nodes', 'users', 'files', 'registrations', 'preprints', 'collections', 'comments', 'logs', 'wikis',
+    'institutions', 'guids', 'resources', 'contributors', 'versions', 'draft_registrations',
+}
+ID_PATTERN = re.compile(r'^(?=.*\d)[a-z0-9]{5}$|^[0-9a-f]{24}$|^\d+$')
+
+
+def endpoint_template(url):
+    # Collapse ids so that /v2/nodes/abc12/files/ and /v2/nodes/xyz34/files/ aggregate as one endpoint.
+    path = urllib.parse.urlsplit(url).path
+    segments = path.split('/')
+    templated = []
+    for index, segment in enumerate(segments):
+        previous = segments[index - 1] if index else ''
+        provider_segment = (previous == 'providers' and 'resources' in segments) or (
+            previous == 'files' and index >= 3 and segments[index - 3] == 'nodes')
+        if provider_segment:
+            # Keep the storage provider name but collapse the file path beneath it.
+            templated.append(segment)
+            templated.extend(['{path}'] if any(segments[index + 1:]) else segments[index + 1:])
+            break
+        if segment and segment != 'me' and segment not in ID_COLLECTIONS and (
+                previous in ID_COLLECTIONS or ID_PATTERN.match(segment)):
+            templated.append('{id}')
+        else:
+            templated.append(segment)
+    return '/'.join(templated) or '/'
+
+
+class RequestEvent:
+    __slots__ = ('event', 'method', 'url', 'status', 'bytes', 'latency', 'retry_count', 'delay', 'reason',
+                 'error', 'started', '_endpoint')
+
+    def __init__(self, event, method=None, url=None, status=None, bytes=None, latency=None, retry_count=0,
+                 delay=None, reason=None, error=None, started=None):
+        self.event = event
+        self.method = method
+        self.url = url
+        self.status = status
+        self.bytes = bytes
+        self.latency = latency
+        self.retry_count = retry_count
+        self.delay = delay
+        self.reason = reason
+        self.error = error
+        self.started = started
+        self._endpoint = None
+
+    @property
+    def endpoint(self):
+        if self._endpoint is None and self.url is not None:
+            self._endpoint = endpoint_template(self.url)
+        return self._endpoint
+
+    def __repr__(self):
+        return 'RequestEvent({!r}, {} {}, status={}, latency={})'.format(
+            self.event, self.method, self.endpoint, self.status, self.latency)
+
+
+class Hooks:
+    def __init__(self):
+        self._callbacks = {event: [] for event in EVENTS}
+        self.active = False
+
+    def add(self, event, callback):
+        if event not in self._callbacks:
+            raise ValueError("Unknown event {}; expected one of {}".format(event, EVENTS))
+        self._callbacks[event].append(callback)
+        self.active = True
+
+    def remove(self, event, callback):
+        self._callbacks[event].remove(callback)
+        self.active = any(self._callbacks.values())
+
+    def wants(self, event):
+        return self.active and bool(self._callbacks[event])
+
+    def emit(self, event, **fields):
+        callbacks = self._callbacks[event]
+        if not callbacks:
+            return
+        request_event = RequestEvent(event=event, **fields)
+        for callback in list(callbacks):
+            callback(request_event)
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class EndpointStats:
+    def __init__(self, max_samples):
+        self.max_samples = max_samples
+        self.count = 0
+        self.errors = 0
+        self.bytes = 0
+        self.total_latency = 0.0
+        self.retries = 0
+        self.throttle_seconds = 0.0
+        self.decode_seconds = 0.0
+        self.decoded_bytes = 0
+        self.samples = []
+
+    def add_latency(self, latency):
+        self.count += 1
+        self.total_latency += latency
+        # Reservoir sampling keeps percentile estimates bounded in memory for long-running sessions.
+        if len(self.samples) < self.max_samples:
+            bisect.insort(self.samples, latency)
+        else:
+            index = random.randrange(self.count)
+            if index < self.max_samples:
+                del self.samples[random.randrange(len(self.samples))]
+                bisect.insort(self.samples, latency)
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'bytes': self.bytes,
+            'retries': self.retries,
+            'throttle_seconds': self.throttle_seconds,
+            'decode_seconds': self.decode_seconds,
+            'decoded_bytes': self.decoded_bytes,
+            'mean': self.total_latency / self.count if self.count else None,
+            'p50': _percentile(self.samples, 0.50),
+            'p95': _percentile(self.samples, 0.95),
+            'p99': _percentile(self.samples, 0.99),
+        }
+
+
+class LatencyAggregator:
+    def __init__(self, max_samples=10000):
+        self.max_samples = max_samples
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def attach(self, session):
+        for event in (AFTER_RESPONSE, RETRY, THROTTLE_SLEEP, DECODE):
+            session.add_hook(event, self)
+        return self
+
+    def detach(self, session):
+        for event in (AFTER_RESPONSE, RETRY, THROTTLE_SLEEP, DECODE):
+            session.remove_hook(event, self)
+
+    def _stats(self, request_event):
+        key = (request_event.method, request_event.endpoint)
+        stats = self.endpoints.get(key)
+        if stats is None:
+            stats = self.endpoints[key] = EndpointStats(max_samples=self.max_samples)
+        return stats
+
+    def __call__(self, request_event):
+        with self._lock:
+            stats = self._stats(request_event)
+            if request_event.event == AFTER_RESPONSE:
+                if request_event.latency is not None:
+                    stats.add_latency(request_event.latency)
+                if request_event.error is not None or (request_event.status or 0) >= 400:
+                    stats.errors += 1
+                stats.bytes += request_event.bytes or 0
+            elif request_event.event == RETRY:
+                stats.retries += 1
+            elif request_event.event == THROTTLE_SLEEP:
+                stats.throttle_seconds += request_event.delay or 0.0
+            elif request_event.event == DECODE:
+                stats.decode_seconds += request_event.latency or 0.0
+                stats.decoded_bytes += request_event.bytes or 0
+
+    def summary(self):
+        with self._lock:
+            return {'{} {}'.format(method, endpoint): stats.summary()
+                    for (method, endpoint), stats in sorted(self.endpoints.items(), key=lambda item: str(item[0]))}
+
+    def to_prometheus(self, prefix='pythosf'):
+        lines = [
+            '# HELP {}_request_latency_seconds OSF API request latency.'.format(prefix),
+            '# TYPE {}_request_latency_seconds summary'.format(prefix),
+        ]
+        counters = []
+        with self._lock:
+            items = sorted(self.endpoints.items(), key=lambda item: str(item[0]))
+            for (method, endpoint), stats in items:
+                labels = 'method="{}",endpoint="{}"'.format(method, _escape_label(endpoint))
+                for quantile in (0.5, 0.95, 0.99):
+                    value = _percentile(stats.samples, quantile)
+                    if value is not None:
+                        lines.append('{}_request_latency_seconds{{{},quantile="{}"}} {}'.format(
+                            prefix, labels, quantile, value))
+                lines.append('{}_request_latency_seconds_sum{{{}}} {}'.format(prefix, labels, stats.total_latency))
+                lines.append('{}_request_latency_seconds_count{{{}}} {}'.format(prefix, labels, stats.count))
+                counters.append((labels, stats))
+        for name, help_text, attribute in (
+                ('request_errors_total', 'Requests that failed or returned an error status.', 'errors'),
+                ('response_bytes_total', 'Response body bytes received.', 'bytes'),
+                ('request_retries_total', 'Requests that were retried.', 'retries'),
+                ('throttle_sleep_seconds_total', 'Time spent waiting on the rate limiter.', 'throttle_seconds'),
+                ('json_decode_seconds_total', 'Time spent decoding JSON response bodies.', 'decode_seconds')):
+            lines.append('# HELP {}_{} {}'.format(prefix, name, help_text))
+            lines.append('# TYPE {}_{} counter'.format(prefix, name))
+            for labels, stats in counters:
+                lines.append('{}_{}{{{}}} {}'.format(prefix, name, labels, getattr(stats, attribute)))
+        return '\n'.join(lines) + '\n'
+
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+class SpanRecorder:
+    # Turns completed requests into OpenTelemetry-style spans. With a tracer (or opentelemetry installed
+    # and use_opentelemetry=True) real spans are emitted; otherwise spans are kept as dicts in self.spans.
+    def __init__(self, tracer=None, use_opentelemetry=False, max_spans=10000):
+        if tracer is None and use_opentelemetry:
+            from opentelemetry import trace
+            tracer = trace.get_tracer('pythosf')
+        self.tracer = tracer
+        self.max_spans = max_spans
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def attach(self, session):
+        session.add_hook(AFTER_RESPONSE, self)
+        return self
+
+    def detach(self, session):
+        session.remove_hook(AFTER_RESPONSE, self)
+
+    def __call__(self, request_event):
+        end_time = time.time_ns()
+        start_time = end_time - int((request_event.latency or 0) * 1e9)
+        attributes = {
+            'http.method': request_event.method,
+            'http.url': request_event.url,
+            'http.route': request_event.endpoint,
+            'http.response_content_length': request_event.bytes,
+            'pythosf.retry_count': request_event.retry_count,
+        }
+        if request_event.status is not None:
+            attributes['http.status_code'] = request_event.status
+        attributes = {key: value for key, value in attributes.items() if value is not None}
+        name = '{} {}'.format(request_event.method, request_event.endpoint)
+        if self.tracer is not None:
+            span = self.tracer.start_span(name, start_time=start_time, attributes=attributes)
+            if request_event.error is not None:
+                span.record_exception(request_event.error)
+            span.end(end_time=end_time)
+            return
+        with self._lock:
+            if len(self.spans) >= self.max_spans:
+                self.spans.pop(0)
+            self.spans.append({
+                'name': name,
+                'start_time_unix_nano': start_time,
+                'end_time_unix_nano': end_time,
+                'attributes': attributes,
+                'status': 'ERROR' if request_event.error is not None or (request_event.status or 0) >= 400 else 'OK',
+            })
@@ -0,0 +1,136 @@
+import collections
+import copy
+import threading
+import time
+from ..utils import BearerAuth
+from .cache import SQLiteCache
+from .coalesce import SingleFlight
+from .instrumentation import Hooks
+from .session import Session
+from .transport import Transport
+
+DEFAULT_IDLE_TIMEOUT = 15 * 60
+
+# Config entries that hold per-token state; a template instance is copied for each token rather than shared.
+PER_TOKEN_CONFIG_KEYS = ('rate_limiter', 'retry_policy', 'cache')
+
+
+class SessionManager:
+    # Hands out one Session per bearer token, all sending through a single pooled Transport, so serving many
+    # users from one process costs one connection pool rather than one per user. Throttle state, retry policy
+    # and response cache are kept per token; sessions unused for idle_timeout seconds, or beyond max_sessions
+    # (least recently used first), are dropped and rebuilt on the next request for that token.
+    def __init__(self, api_base_url, default_version=None, config=None, transport=None,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT, max_sessions=None):
+        self.api_base_url = api_base_url
+        self.default_version = default_version
+        self.config = config or {}
+        if self.config.get('index') is not None:
+            # An index would answer one user's lookups with listings fetched under another user's token.
+            raise ValueError("SessionManager cannot share a MetadataIndex between tokens; give each session its "
+                             "own index instead")
+        self.transport = transport or Transport.from_config(self.config)
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.hooks = Hooks()
+        # Coalescing keys include the Authorization header, so one SingleFlight can safely serve every token.
+        self.single_flight = self.config.get('coalesce') or None
+        if self.single_flight is True:
+            self.single_flight = SingleFlight()
+        self.evicted_count = 0
+        self._sessions = collections.OrderedDict()
+        self._last_used = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def __contains__(self, token):
+        with self._lock:
+            return token in self._sessions
+
+    @property
+    def connection_count(self):
+        return self.transport.stats.connection_count
+
+    @property
+    def pool_hit_count(self):
+        return self.transport.stats.pool_hit_count
+
+    def add_hook(self, event, callback):
+        self.hooks.add(event, callback)
+
+    def remove_hook(self, event, callback):
+        self.hooks.remove(event, callback)
+
+    def _session_config(self):
+        config = dict(self.config)
+        for key in PER_TOKEN_CONFIG_KEYS:
+            value = config.get(key)
+            if value is None or isinstance(value, bool):
+                continue
+            if isinstance(value, SQLiteCache):
+                # SQLite cache entries are already keyed by Authorization header, so one file serves every token.
+                continue
+            # Copies go through the pickling hooks, so each token starts from the template's settings with its
+            # own empty state.
+            config[key] = copy.copy(value)
+        config['coalesce'] = self.single_flight
+        return config
+
+    def _new_session(self, token):
+        session = Session(api_base_url=self.api_base_url, auth=BearerAuth(token),
+                          default_version=self.default_version, config=self._session_config(),
+                          transport=self.transport)
+        session.hooks = self.hooks
+        return session
+
+    def session(self, token):
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None:
+                session = self._sessions[token] = self._new_session(token)
+            else:
+                self._sessions.move_to_end(token)
+            self._last_used[token] = now
+            self._evict(now)
+        return session
+
+    def _evict(self, now):
+        # Sessions are kept in least-recently-used order, so idle ones are always at the front.
+        while self._sessions:
+            token = next(iter(self._sessions))
+            idle = self.idle_timeout is not None and now - self._last_used[token] > self.idle_timeout
+            if not idle and (self.max_sessions is None or len(self._sessions) <= self.max_sessions):
+                break
+            self._drop(token)
+            self.evicted_count += 1
+
+    def _drop(self, token):
+        self._sessions.pop(token)
+        del self._last_used[token]
+
+    def evict_idle(self):
+        with self._lock:
+            before = len(self._sessions)
+            self._evict(time.monotonic())
+            return before - len(self._sessions)
+
+    def remove(self, token):
+        with self._lock:
+            if token in self._sessions:
+                self._drop(token)
+
+    def close(self):
+        with self._lock:
+            self._sessions.clear()
+            self._last_used.clear()
+        self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,8 +1,22 @@
+import logging
+import requests
 from .api_detail import APIDetail
+from .batch import BULK_CONTENT_TYPE, DEFAULT_BATCH_WORKERS, BatchResult, bulk_rejected, chunks, run_concurrently
+from .provider import Provider
+from .user import User
+from .walker import DEFAULT_WALK_WORKERS, Walker, matches_any
+
+
+def contributor_user(session, data):
+    user_data = ((data.get('embeds') or {}).get('users') or {}).get('data')
+    if user_data is None:
+        return None
+    return User(session=session, data=user_data)
 
 
 class Node(APIDetail):
     def __init__(self, session, id=None, self_link=None, data=None):
+        self.providers = []
         super().__init__(session=session, data=data)
         if not data:
             self.id = id
@@ -10,7 +24,14 @@ class Node(APIDetail):
             self.links = None
             self.meta = None
             self.self_link = self_link
-        self.providers = []
+
+    def _embed_factories(self):
+        return {
+            'files': ('providers', Provider),
+            'contributors': ('contributors', contributor_user),
+            'children': ('children', Node),
+            'parent': ('parent', Node),
+        }
 
     def create(self, title, category="project", description=None, public=None, tags=None,
                template_from=None, query_parameters=None, auth=None):
@@ -34,6 +55,83 @@ class Node(APIDetail):
             child_node._update(response=response)
         return child_node
 
+    @classmethod
+    def bulk_create(cls, session, items, query_parameters=None, auth=None, bulk=True,
+                    workers=DEFAULT_BATCH_WORKERS):
+        # items are dicts of Node.create keyword arguments. Results come back in the same order, one per item.
+        results = [None] * len(items)
+        individual = list(range(len(items))) if not bulk else []
+        for start, chunk in (chunks(items) if bulk else ()):
+            body = {'data': [{'type': 'nodes', 'attributes': cls._create_attributes(item)} for item in chunk]}
+            try:
+                response = session.post(url='/v2/nodes/', raw_body=session.codec.dumps(body),
+                                        headers={'content-type': BULK_CONTENT_TYPE},
+                                        query_parameters=query_parameters, auth=auth)
+            except requests.exceptions.RequestException as e:
+                if not bulk_rejected(e):
+                    for offset in range(len(chunk)):
+                        results[start + offset] = BatchResult(start + offset, error=e)
+                    continue
+                # Bulk requests are all-or-nothing, so fall back to one request per item to isolate failures.
+                logging.log(logging.INFO, 'Bulk node creation failed, creating individually: {}'.format(e))
+                individual.extend(range(start, start + len(chunk)))
+                continue
+            for offset, data in enumerate(response['data']):
+                node = cls(session=session)
+                node._update(response=data)
+                results[start + offset] = BatchResult(start + offset, value=node)
+
+        calls = [(cls(session=session).create, (),
+                  {**items[index], 'query_parameters': query_parameters, 'auth': auth})
+                 for index in individual]
+        for index, result in zip(individual, run_concurrently(calls, workers=workers)):
+            result.index = index
+            results[index] = result
+        return results
+
+    @staticmethod
+    def _create_attributes(item):
+        attributes = {'category': 'project', **item}
+        return {key: value for key, value in attributes.items() if value is not None}
+
+    def bulk_create_children(self, items, query_parameters=None, auth=None, workers=DEFAULT_BATCH_WORKERS):
+        calls = [(self.create_child, (), {**item, 'query_parameters': query_parameters, 'auth': auth})
+                 for item in items]
+        return run_concurrently(calls, workers=workers)
+
+    @classmethod
+    def bulk_delete(cls, nodes, query_parameters=None, auth=None, bulk=True, workers=DEFAULT_BATCH_WORKERS):
+        results = [BatchResult(index) for index in range(len(nodes))]
+        individual = [] if bulk else list(range(len(nodes)))
+        for start, chunk in (chunks(nodes) if bulk else ()):
+            present = [node for node in chunk if node.id is not None]
+            if not present:
+                continue
+            body = {'data': [{'type': 'nodes', 'id': node.id} for node in present]}
+            try:
+                present[0].session.delete(url='/v2/nodes/', item_type='nodes',
+                                          raw_body=present[0].session.codec.dumps(body),
+                                          headers={'content-type': BULK_CONTENT_TYPE},
+                                          query_parameters=query_parameters, auth=auth)
+            except requests.exceptions.RequestException as e:
+                if not bulk_rejected(e):
+                    for offset, node in enumerate(chunk):
+                        if node.id is not None:
+                            results[start + offset] = BatchResult(start + offset, error=e)
+                    continue
+                logging.log(logging.INFO, 'Bulk node deletion failed, deleting individually: {}'.format(e))
+                individual.extend(range(start, start + len(chunk)))
+                continue
+            for node in present:
+                node.id = None
+
+        calls = [(nodes[index].delete, (), {'query_parameters': query_parameters, 'auth': auth})
+                 for index in individual]
+        for index, result in zip(individual, run_concurrently(calls, workers=workers)):
+            result.index = index
+            results[index] = result
+        return results
+
     def delete(self, query_parameters=None, auth=None):
         if self.id is None:
             return None
@@ -44,7 +142,8 @@ class Node(APIDetail):
             self.id = None
             return None
 
-    def get(self, query_parameters=None, auth=None):
+    def get(self, query_parameters=None, auth=None, fields=None, embed=None, include=None):
+        # embed=['files', 'contributors'] fills self.providers and self.contributors from the same response.
         url = None
         if self.self_link:
             url = self.self_link
@@ -55,7 +154,7 @@ class Node(APIDetail):
 
         if url:
             response = self.session.get(
-                url=url, query_parameters=query_parameters, auth=auth)
+                url=url, query_parameters=query_parameters, auth=auth, fields=fields, embed=embed, include=include)
             if response:
                 self._update(response=response)
         else:
@@ -75,3 +174,26 @@ class Node(APIDetail):
                     Provider(session=self.session, data=provider))
 
         return self.providers
+
+    def iter_providers(self, query_parameters=None, page_size=None, auth=None):
+        if not getattr(self, 'relationships', False):
+            self.get(auth=auth)
+        providers_url = self.relationships.files['links']['related']['href']
+        pages = self.session.iter_pages(url=providers_url, query_parameters=query_parameters,
+                                        page_size=page_size, auth=auth)
+        for page in pages:
+            for provider in page['data']:
+                yield Provider(session=self.session, data=provider)
+
+    def walk(self, workers=DEFAULT_WALK_WORKERS, max_depth=None, include=None, exclude=None, page_size=None,
+             stats=None, auth=None):
+        walker = Walker(workers=workers, max_depth=max_depth, include=include, exclude=exclude,
+                        page_size=page_size, stats=stats, auth=auth)
+        roots = []
+        for provider in self.iter_providers(auth=auth):
+            if matches_any(provider.name, walker.exclude):
+                continue
+            if not walker.include or matches_any(provider.name, walker.include):
+                yield provider.name, provider
+            roots.append((provider.name, provider))
+        yield from walker.walk(roots=roots)
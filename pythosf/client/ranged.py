@@ -0,0 +1,179 @@
+import json
+import mmap
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .. import exceptions
+from ..utils import DEFAULT_CHUNK_SIZE, new_hashers, verify_hashes
+
+DEFAULT_RANGE_WORKERS = 8
+DEFAULT_RANGE_SIZE = 16 * 1024 * 1024
+MANIFEST_SUFFIX = '.pythosf-part'
+
+
+class _RangeNotSupported(Exception):
+    pass
+
+
+class RangedDownloadStats:
+    def __init__(self):
+        self.ranges = 0
+        self.resumed = 0
+        self.fetched = 0
+        self.bytes = 0
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def record(self, length):
+        with self._lock:
+            self.fetched += 1
+            self.bytes += length
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    def __repr__(self):
+        return 'RangedDownloadStats(ranges={}, resumed={}, fetched={}, bytes={})'.format(
+            self.ranges, self.resumed, self.fetched, self.bytes)
+
+
+def manifest_path(path):
+    return '{}{}'.format(os.fspath(path), MANIFEST_SUFFIX)
+
+
+class RangedDownload:
+    # Fetches a file as fixed-size byte ranges on a thread pool and writes each one into its place in a
+    # memory-mapped, preallocated output file. A sidecar manifest lists the ranges already on disk, so running
+    # the same download again after an interruption only fetches what is missing. The manifest is removed once
+    # the whole file has been written and its hashes match the ones OSF reports.
+    def __init__(self, file, path, workers=DEFAULT_RANGE_WORKERS, range_size=DEFAULT_RANGE_SIZE, verify=True,
+                 query_parameters=None, auth=None, stats=None):
+        self.file = file
+        self.path = os.fspath(path)
+        self.manifest_path = manifest_path(self.path)
+        self.workers = workers
+        # Whole multiples of the allocation granularity keep every range's offset valid for mmap.flush.
+        granularity = mmap.ALLOCATIONGRANULARITY
+        self.range_size = max(granularity, (range_size // granularity) * granularity)
+        self.expected_hashes = file.hashes if verify else {}
+        self.query_parameters = query_parameters
+        self.auth = auth
+        self.stats = stats or RangedDownloadStats()
+        self.size = getattr(file, 'size', None)
+        self._manifest_lock = threading.Lock()
+
+    def _identity(self):
+        # A manifest only applies to the same version of the same file split the same way.
+        return {
+            'url': self.file.links.download,
+            'size': self.size,
+            'range_size': self.range_size,
+            'date_modified': getattr(self.file, 'date_modified', None),
+            'hashes': self.file.hashes,
+        }
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path) as manifest_file:
+                manifest = json.load(manifest_file)
+        except (OSError, ValueError):
+            return set()
+        if manifest.get('identity') != self._identity() or not os.path.exists(self.path):
+            return set()
+        return set(manifest.get('done', []))
+
+    def _save_manifest(self, done):
+        temporary_path = '{}.tmp'.format(self.manifest_path)
+        with open(temporary_path, 'w') as manifest_file:
+            json.dump({'identity': self._identity(), 'done': sorted(done)}, manifest_file)
+        os.replace(temporary_path, self.manifest_path)
+
+    def _remove_manifest(self):
+        if os.path.exists(self.manifest_path):
+            os.remove(self.manifest_path)
+
+    def run(self):
+        self.stats.started = time.monotonic()
+        try:
+            if not self.size:
+                # Nothing to split: empty files and files without a reported size take the serial path.
+                self.file.download(to=self.path, verify=bool(self.expected_hashes),
+                                   query_parameters=self.query_parameters, auth=self.auth)
+                self._remove_manifest()
+                return self.stats
+            try:
+                self._run_ranges()
+            except _RangeNotSupported:
+                self._remove_manifest()
+                self.file.download(to=self.path, verify=bool(self.expected_hashes),
+                                   query_parameters=self.query_parameters, auth=self.auth)
+            return self.stats
+        finally:
+            self.stats.finished = time.monotonic()
+
+    def _run_ranges(self):
+        range_count = -(-self.size // self.range_size)
+        done = self._load_manifest()
+        self.stats.ranges = range_count
+        self.stats.resumed = len(done)
+        mode = 'r+b' if done else 'w+b'
+        with open(self.path, mode) as file_object:
+            file_object.truncate(self.size)
+            with mmap.mmap(file_object.fileno(), self.size) as output:
+                if not done:
+                    self._save_manifest(done)
+                missing = [index for index in range(range_count) if index not in done]
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    futures = [executor.submit(self._fetch, output, index, done) for index in missing]
+                    try:
+                        for future in futures:
+                            future.result()
+                    except BaseException:
+                        for future in futures:
+                            future.cancel()
+                        raise
+                if self.expected_hashes:
+                    self._verify(output)
+        self._remove_manifest()
+
+    def _fetch(self, output, index, done):
+        start = index * self.range_size
+        end = min(start + self.range_size, self.size) - 1
+        response = self.file.session.stream(url=self.file.links.download, query_parameters=self.query_parameters,
+                                            headers={'Range': 'bytes={}-{}'.format(start, end)}, auth=self.auth)
+        with response:
+            if response.status_code != 206:
+                raise _RangeNotSupported('Server answered a range request with status {}'.format(
+                    response.status_code))
+            position = start
+            for chunk in response.iter_content(chunk_size=DEFAULT_CHUNK_SIZE):
+                if position + len(chunk) > end + 1:
+                    raise ValueError('Server sent more than the requested range {}-{}'.format(start, end))
+                output[position:position + len(chunk)] = chunk
+                position += len(chunk)
+        if position != end + 1:
+            raise ValueError('Range {}-{} ended after {} bytes'.format(start, end, position - start))
+        # Only ranges that have reached the disk are recorded, so a crash never marks unwritten data as done.
+        output.flush(start, end + 1 - start)
+        with self._manifest_lock:
+            done.add(index)
+            self._save_manifest(done)
+        self.stats.record(end + 1 - start)
+
+    def _verify(self, output):
+        hashers = new_hashers(self.expected_hashes)
+        for offset in range(0, self.size, DEFAULT_CHUNK_SIZE):
+            chunk = output[offset:offset + DEFAULT_CHUNK_SIZE]
+            for hasher in hashers.values():
+                hasher.update(chunk)
+        try:
+            verify_hashes(hashers, self.expected_hashes)
+        except exceptions.ChecksumMismatch:
+            # The bytes on disk are wrong, so the next attempt has to start over.
+            self._remove_manifest()
+            raise
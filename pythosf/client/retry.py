@@ -0,0 +1,194 @@
+import collections
+import random
+import threading
+import time
+import requests
+
+THROTTLED = 'throttled'
+SERVER_ERROR = 'server_error'
+CONNECTION_ERROR = 'connection_error'
+
+DEFAULT_MAX_RETRIES = {
+    THROTTLED: 10,
+    SERVER_ERROR: 3,
+    CONNECTION_ERROR: 3,
+}
+# A throttled request was rejected before it ran, so it is always safe to resend. Other failures may have
+# reached the server, so only idempotent methods are retried for them.
+IDEMPOTENT_METHODS = ('GET', 'PUT', 'DELETE')
+RETRYABLE_STATUS_CODES = (500, 502, 503, 504)
+
+
+def parse_retry_after(value):
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
+
+
+def classify(response=None, error=None):
+    if error is not None:
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return CONNECTION_ERROR
+        return None
+    if response.status_code == 429:
+        return THROTTLED
+    if response.status_code in RETRYABLE_STATUS_CODES:
+        return SERVER_ERROR
+    return None
+
+
+class RetryPolicy:
+    def __init__(self, max_retries=None, backoff_base=0.5, backoff_max=60.0, jitter=True,
+                 idempotent_methods=IDEMPOTENT_METHODS):
+        self.max_retries = {**DEFAULT_MAX_RETRIES, **(max_retries or {})}
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.idempotent_methods = idempotent_methods
+
+    def should_retry(self, category, attempt, method):
+        if category is None or attempt >= self.max_retries.get(category, 0):
+            return False
+        return category == THROTTLED or method in self.idempotent_methods
+
+    def delay(self, attempt, retry_after=None):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        if self.jitter:
+            # Full jitter keeps a fleet of workers from retrying in lockstep.
+            delay = random.uniform(0, delay)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+class RateLimiter:
+    def __init__(self, rate=None, burst=None, min_rate=0.5, max_rate=None, increase=0.01, decrease=0.5,
+                 safety=0.9):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.safety = safety
+        self.throttle_count = 0
+        self.throttled_seconds = 0.0
+        self._tokens = self._capacity()
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._recent = collections.deque(maxlen=50)
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Monotonic timestamps mean nothing in another process, so only the settings and learned rate travel.
+        state = {key: value for key, value in self.__dict__.items() if not key.startswith('_')}
+        state['throttle_count'] = 0
+        state['throttled_seconds'] = 0.0
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._tokens = self._capacity()
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._recent = collections.deque(maxlen=50)
+        self._lock = threading.Lock()
+
+    def _capacity(self):
+        if self.burst is not None:
+            return self.burst
+        return max(1.0, self.rate or 1.0)
+
+    def _refill(self, now):
+        if self.rate is not None:
+            self._tokens = min(self._capacity(), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _wait_time(self, now):
+        if self._paused_until > now:
+            return self._paused_until - now
+        if self.rate is None:
+            return 0.0
+        self._refill(now)
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def try_acquire(self):
+        # Takes a token and returns 0, or returns how long to wait before trying again.
+        with self._lock:
+            now = time.monotonic()
+            wait_time = self._wait_time(now)
+            if not wait_time:
+                if self.rate is not None:
+                    self._tokens -= 1
+                self._recent.append(now)
+            return wait_time
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.throttled_seconds += seconds
+
+    def acquire(self):
+        waited = 0.0
+        wait_time = self.try_acquire()
+        while wait_time:
+            time.sleep(wait_time)
+            waited += wait_time
+            wait_time = self.try_acquire()
+        if waited:
+            self.record_wait(waited)
+        return waited
+
+    def _observed_rate(self):
+        if len(self._recent) < 2:
+            return None
+        elapsed = self._recent[-1] - self._recent[0]
+        return (len(self._recent) - 1) / elapsed if elapsed > 0 else None
+
+    def _set_rate(self, rate):
+        if self.max_rate is not None:
+            rate = min(rate, self.max_rate)
+        self.rate = max(self.min_rate, rate)
+        self._tokens = min(self._tokens, self._capacity())
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def on_throttled(self, retry_after=None):
+        with self._lock:
+            self.throttle_count += 1
+            current = self.rate or self._observed_rate()
+            if current is not None:
+                self._set_rate(current * self.decrease)
+            if retry_after:
+                # Every caller sharing the limiter waits out the server's back-off window together.
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+    def on_response(self, response):
+        headers = response.headers
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset = headers.get('X-RateLimit-Reset')
+        with self._lock:
+            if remaining is not None and reset is not None:
+                self._update_from_headers(remaining, reset)
+            elif self.rate is not None and response.status_code < 400:
+                self._set_rate(self.rate * (1 + self.increase))
+
+    def _update_from_headers(self, remaining, reset):
+        try:
+            remaining = float(remaining)
+            reset = float(reset)
+        except ValueError:
+            return
+        # X-RateLimit-Reset is either an epoch timestamp or a number of seconds until the window resets.
+        seconds_to_reset = reset - time.time() if reset > 1e9 else reset
+        seconds_to_reset = max(seconds_to_reset, 1.0)
+        if remaining <= 0:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds_to_reset)
+            return
+        self._set_rate(self.safety * remaining / seconds_to_reset)
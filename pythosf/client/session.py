@@ -1,25 +1,305 @@
-import json
 import logging
+import math
 import requests
+import threading
 import time
 import urllib
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 from .. import exceptions
-from ..utils import combine_headers
+from ..utils import auth_headers, combine_headers, json_api_parameters
+from . import instrumentation
+from . import retry as retries
+from .batch import DEFAULT_BATCH_WORKERS, Batch
+from .cache import CacheEntry, MemoryCache, cache_key, osf_urls_for_write
+from .codec import get_codec
+from .coalesce import SingleFlight
+from .instrumentation import Hooks
+from .retry import RateLimiter, RetryPolicy
+from .transport import Transport
+
+SUPPORTED_METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+BODY_METHODS = ('POST', 'PUT', 'PATCH')
+DEFAULT_PAGE_WORKERS = 4
 
 
 class Session:
-    def __init__(self, api_base_url, auth=None, default_version=None, config=None):
+    def __init__(self, api_base_url, auth=None, default_version=None, config=None, transport=None):
         self.api_base_url = api_base_url
         self.default_version = default_version
         self.auth = auth
+        self.config = config or {}
+        # A transport passed in may be shared with other sessions, so only one built here is closed with the session.
+        self._owns_transport = transport is None
+        self.transport = transport or Transport.from_config(self.config)
+        self.page_workers = self.config.get('page_workers', DEFAULT_PAGE_WORKERS)
+        self.retry_policy = self.config.get('retry_policy') or RetryPolicy()
+        self.rate_limiter = self.config.get('rate_limiter') or RateLimiter()
+        self.cache = self.config.get('cache')
+        if self.cache is True:
+            self.cache = MemoryCache()
+        self.index = self.config.get('index')
+        self.codec = get_codec(self.config.get('json_codec'))
+        # With config['coalesce'], concurrent identical GETs share one request and one decoded result.
+        self.single_flight = self.config.get('coalesce') or None
+        if self.single_flight is True:
+            self.single_flight = SingleFlight()
         self.request_count = 0
         self.error_count = 0
+        self._counter_lock = threading.Lock()
+        self.hooks = Hooks()
 
         self.base_headers = {'content-type': 'application/vnd.api+json'}
 
+    @property
+    def connection_count(self):
+        return self.transport.stats.connection_count
+
+    @property
+    def pool_hit_count(self):
+        return self.transport.stats.pool_hit_count
+
+    @property
+    def coalescing_stats(self):
+        if self.single_flight is None:
+            return {}
+        return self.single_flight.summary()
+
+    def __getstate__(self):
+        # Locks and hooks stay behind; the transport and other shared helpers pickle their own compact state.
+        state = dict(self.__dict__)
+        for key in ('_counter_lock', 'hooks'):
+            state.pop(key, None)
+        state['request_count'] = 0
+        state['error_count'] = 0
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # The unpickled transport is a fresh copy that nothing else in this process shares.
+        self._owns_transport = True
+        self._counter_lock = threading.Lock()
+        self.hooks = Hooks()
+
+    def add_hook(self, event, callback):
+        self.hooks.add(event, callback)
+
+    def remove_hook(self, event, callback):
+        self.hooks.remove(event, callback)
+
+    def close(self):
+        if self._owns_transport:
+            self.transport.close()
+
+    def batch(self, workers=DEFAULT_BATCH_WORKERS):
+        return Batch(workers=workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def json_api_request(self, url, method=None, item_id=None, item_type=None, attributes=None, raw_body=None,
-                         query_parameters=None, fields=None, headers=None, retry=True, auth=None):
+                         query_parameters=None, fields=None, headers=None, retry=True, auth=None, embed=None,
+                         include=None, raw=False):
+        # raw=True returns the undecoded response bytes and raw='memoryview' a zero-copy view of them.
+        if fields or embed or include:
+            query_parameters = json_api_parameters(query_parameters, fields=fields, embed=embed, include=include)
+        method, url, request_kwargs = self._prepare_request(
+            url=url, method=method, item_id=item_id, item_type=item_type, attributes=attributes, raw_body=raw_body,
+            query_parameters=query_parameters, headers=headers, auth=auth)
+        if method == 'GET' and self.single_flight is not None:
+            key = '{}:{}'.format(self._request_key(url, request_kwargs), raw)
+            return self.single_flight.do(key, url, lambda: self._get(url, request_kwargs, retry=retry, raw=raw))
+        if method == 'GET':
+            return self._get(url, request_kwargs, retry=retry, raw=raw)
+        response = self._send(method=method, url=url, request_kwargs=request_kwargs, retry=retry)
+        result = self._decode(response.content, method=method, url=url, raw=raw)
+        self._invalidate_after_write(url, None if raw else result)
+        return result
+
+    def _invalidate_after_write(self, url, result):
+        if self.cache is not None:
+            for affected_url in osf_urls_for_write(self.api_base_url, url, result):
+                self.cache.invalidate(affected_url)
+
+    def _get(self, url, request_kwargs, retry=True, raw=False):
+        if self.cache is not None:
+            return self._cached_get(url=url, request_kwargs=request_kwargs, retry=retry, raw=raw)
+        response = self._send(method='GET', url=url, request_kwargs=request_kwargs, retry=retry)
+        return self._decode(response.content, method='GET', url=url, raw=raw)
+
+    @staticmethod
+    def _request_key(url, request_kwargs):
+        authorization = auth_headers(request_kwargs['auth'], 'GET', url).get('Authorization')
+        return cache_key(url, query_parameters=request_kwargs['params'],
+                         accept=request_kwargs['headers'].get('Accept-Header'), auth_key=authorization)
+
+    def _decode(self, content, method=None, url=None, raw=False):
+        if raw:
+            return memoryview(content) if raw == 'memoryview' else content
+        started = time.perf_counter()
+        try:
+            return self.codec.loads(content)
+        except ValueError:
+            return None
+        finally:
+            if self.hooks.active:
+                self.hooks.emit(instrumentation.DECODE, method=method, url=url, bytes=len(content),
+                                latency=time.perf_counter() - started)
+
+    def _cached_get(self, url, request_kwargs, retry=True, raw=False):
+        key = self._request_key(url, request_kwargs)
+        entry = self.cache.get(key)
+        if entry is not None and entry.is_fresh(self.cache.ttl):
+            self.cache.record('hits')
+            return self._decode(entry.body, method='GET', url=url, raw=raw)
+        response = self._send(method='GET', url=url, request_kwargs=self._conditional_request(entry, request_kwargs),
+                              retry=retry)
+        return self._decode(self._cached_body(key, url, entry, response), method='GET', url=url, raw=raw)
+
+    @staticmethod
+    def _conditional_request(entry, request_kwargs):
+        if entry is None or not entry.has_validators:
+            return request_kwargs
+        conditional_headers = {}
+        if entry.etag:
+            conditional_headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            conditional_headers['If-Modified-Since'] = entry.last_modified
+        return {**request_kwargs, 'headers': combine_headers(request_kwargs['headers'], conditional_headers)}
+
+    def _cached_body(self, key, url, entry, response):
+        # Returns the body to decode for a revalidation or miss, storing fresh 200 responses.
+        if response.status_code == 304 and entry is not None:
+            self.cache.record('revalidations')
+            self.cache.touch(key)
+            return entry.body
+
+        self.cache.record('misses')
+        if response.status_code == 200:
+            self.cache.set(key, CacheEntry(url=url, body=response.content, etag=response.headers.get('ETag'),
+                                           last_modified=response.headers.get('Last-Modified')))
+        return response.content
+
+    def stream(self, url, method="GET", query_parameters=None, headers=None, retry=True, auth=None, raw_body=None):
+        method, url, request_kwargs = self._prepare_request(
+            url=url, method=method, raw_body=raw_body, query_parameters=query_parameters, headers=headers, auth=auth)
+        request_kwargs['stream'] = True
+        return self._send(method=method, url=url, request_kwargs=request_kwargs, retry=retry)
+
+    def _send(self, method, url, request_kwargs, retry=True):
+        body, body_position, rewindable = self._body_state(request_kwargs)
+        attempt = 0
+
+        while True:
+            self._before_attempt(method, url, attempt, waited=self.rate_limiter.acquire())
+            started = time.perf_counter()
+            try:
+                response = self.transport.request(method, url, **request_kwargs)
+            except requests.exceptions.RequestException as e:
+                if self.hooks.active:
+                    self.hooks.emit(instrumentation.AFTER_RESPONSE, method=method, url=url, error=e,
+                                    latency=time.perf_counter() - started, retry_count=attempt)
+                category = self._retry_after_error(method, e, retries.classify(error=e), attempt, retry,
+                                                   rewindable)
+                if category is None:
+                    raise
+                self._wait_before_retry(method, url, category, attempt, body, body_position)
+                attempt += 1
+                continue
+
+            if self.hooks.active:
+                content_length = response.headers.get('Content-Length')
+                response_bytes = int(content_length) if content_length else (
+                    None if request_kwargs.get('stream') else len(response.content))
+                self.hooks.emit(instrumentation.AFTER_RESPONSE, method=method, url=url,
+                                status=response.status_code, bytes=response_bytes,
+                                latency=time.perf_counter() - started, retry_count=attempt)
+            decision = self._check_response(method, response, attempt, retry, rewindable)
+            if decision is None:
+                return response
+            response.close()
+            category, retry_after = decision
+            self._wait_before_retry(method, url, category, attempt, body, body_position, retry_after=retry_after)
+            attempt += 1
+
+    # The per-attempt decisions below are shared with AsyncSession, whose loop only differs in how it waits.
+
+    @staticmethod
+    def _body_state(request_kwargs):
+        body = request_kwargs.get('data')
+        body_position = body.tell() if hasattr(body, 'seek') and hasattr(body, 'tell') else None
+        # Bodies we cannot rewind (generators, iterators) can only be sent once.
+        rewindable = body is None or isinstance(body, (str, bytes)) or body_position is not None
+        return body, body_position, rewindable
+
+    def _before_attempt(self, method, url, attempt, waited):
+        if self.hooks.active:
+            if waited:
+                self.hooks.emit(instrumentation.THROTTLE_SLEEP, method=method, url=url, delay=waited,
+                                retry_count=attempt)
+            self.hooks.emit(instrumentation.BEFORE_REQUEST, method=method, url=url, retry_count=attempt)
+
+    def _retry_after_error(self, method, error, category, attempt, retry, rewindable):
+        # Returns the category to retry a failed connection with, or None once the caller should raise.
+        if retry and rewindable and self.retry_policy.should_retry(category, attempt, method):
+            return category
+        with self._counter_lock:
+            self.error_count += 1
+        logging.log(logging.ERROR, 'HTTP Request failed: {}'.format(error))
+        return None
+
+    def _check_response(self, method, response, attempt, retry, rewindable):
+        # Returns (category, retry_after) when the response should be retried and None when it is final.
+        # Final error statuses raise HTTPError, except throttling with retry=False, which is handed back.
+        with self._counter_lock:
+            self.request_count += 1
+        self.rate_limiter.on_response(response)
+        category = retries.classify(response=response)
+        if category is not None:
+            retry_after = retries.parse_retry_after(response.headers.get('Retry-After'))
+            if category == retries.THROTTLED:
+                self.rate_limiter.on_throttled(retry_after=retry_after)
+                if not retry:
+                    logging.log(logging.ERROR, "Throttled. Please retry after {}s".format(retry_after))
+                    return None
+            if retry and rewindable and self.retry_policy.should_retry(category, attempt, method):
+                return category, retry_after
+        if response.status_code >= 400:
+            status_code = response.status_code
+            content = getattr(response, 'content', None)
+            with self._counter_lock:
+                self.error_count += 1
+            error = requests.exceptions.HTTPError(
+                "Status code {}. {}".format(status_code, content), response=response)
+            logging.log(logging.ERROR, 'HTTP Request failed: {}'.format(error))
+            raise error
+        return None
+
+    def _retry_delay(self, method, url, category, attempt, retry_after=None):
+        # Returns how long the caller should sleep before the next attempt.
+        delay = self.retry_policy.delay(attempt, retry_after=retry_after)
+        logging.log(logging.INFO, "{} {} failed ({}): retrying in {:.2f}s".format(method, url, category, delay))
+        if self.hooks.active:
+            self.hooks.emit(instrumentation.RETRY, method=method, url=url, delay=delay, reason=category,
+                            retry_count=attempt + 1)
+        if category == retries.THROTTLED:
+            # Throttling waits are taken in the shared rate limiter so every caller backs off together.
+            self.rate_limiter.pause(delay)
+            return 0
+        return delay
+
+    def _wait_before_retry(self, method, url, category, attempt, body, body_position, retry_after=None):
+        delay = self._retry_delay(method, url, category, attempt, retry_after=retry_after)
+        if delay:
+            time.sleep(delay)
+        if body_position is not None:
+            body.seek(body_position)
+
+    def _prepare_request(self, url, method=None, item_id=None, item_type=None, attributes=None, raw_body=None,
+                         query_parameters=None, headers=None, auth=None):
         request_body = {}
         auth = auth or self.auth
 
@@ -41,6 +321,9 @@ class Session:
 
         if method is not None:
             method = method.upper()
+        if method not in SUPPORTED_METHODS:
+            raise exceptions.UnsupportedHTTPMethod(
+                "Only GET/POST/PUT/PATCH/DELETE supported, not {}".format(method))
         if query_parameters:
             if not query_parameters.get('version', None):
                 headers=combine_headers(
@@ -52,69 +335,115 @@ class Session:
                 headers,
                 {'Accept-Header': 'application/vnd.api+json;version={}'.format(self.default_version)}
             )
-        keep_trying = True
-        response = None
-
-        while keep_trying:
-            keep_trying = False
-            try:
-                if method == 'GET':
-                    response = requests.get(url, params=query_parameters,
-                                            headers=combine_headers(self.base_headers, headers), auth=auth)
-                elif method == 'POST':
-                    response = requests.post(url, params=query_parameters, json=request_data, data=raw_body,
-                                             headers=combine_headers(self.base_headers, headers), auth=auth)
-                elif method == 'PUT':
-                    response = requests.put(url, params=query_parameters, json=request_data, data=raw_body,
-                                            headers=combine_headers(self.base_headers, headers), auth=auth)
-                elif method == 'PATCH':
-                    response = requests.patch(url, params=query_parameters, json=request_data, data=raw_body,
-                                              headers=combine_headers(self.base_headers, headers), auth=auth)
-                elif method == 'DELETE':
-                    response = requests.delete(url, params=query_parameters,
-                                               headers=combine_headers(self.base_headers, headers), auth=auth)
-                else:
-                    raise exceptions.UnsupportedHTTPMethod(
-                        "Only GET/POST/PUT/PATCH/DELETE supported, not {}".format(method))
-                if response.status_code == 429:
-                    keep_trying = retry
-                    response_headers = response.headers
-                    wait_time = response_headers['Retry-After']
-                    if keep_trying:
-                        logging.log(logging.INFO, "Throttled: retrying in {wait_time}s")
-                        time.sleep(int(wait_time))
-                    else:
-                        logging.log(logging.ERROR, "Throttled. Please retry after {wait_time}s")
-                elif response.status_code >= 400:
-                    status_code = response.status_code
-                    content = getattr(response, 'content', None)
-                    raise requests.exceptions.HTTPError(
-                        "Status code {}. {}".format(status_code, content))
-                self.request_count += 1
-            except requests.exceptions.RequestException as e:
-                self.error_count += 1
-                logging.log(logging.ERROR,'HTTP Request failed: {}'.format(e))
-                raise
-        try:
-            return response.json()
-        except json.decoder.JSONDecodeError:
-            return None
+        request_kwargs = {
+            'params': query_parameters,
+            'headers': combine_headers(self.base_headers, headers),
+            'auth': auth,
+        }
+        if method in BODY_METHODS:
+            request_kwargs['data'] = raw_body if raw_body is not None or request_data is None else (
+                self.codec.dumps(request_data))
+        elif method == 'DELETE' and raw_body is not None:
+            request_kwargs['data'] = raw_body
+        return method, url, request_kwargs
 
-    def get(self, url, query_parameters=None, headers=None, retry=True, auth=None, retrieve_all=False):
-        response = self.json_api_request(url=url, method="GET", query_parameters=query_parameters,
-                                         headers=headers, retry=retry, auth=auth)
+    def get(self, url, query_parameters=None, headers=None, retry=True, auth=None, retrieve_all=False, fields=None,
+            embed=None, include=None, raw=False):
+        if raw and retrieve_all:
+            raise ValueError("retrieve_all needs decoded pages and cannot be combined with raw")
+        response = self.json_api_request(url=url, method="GET", query_parameters=query_parameters, fields=fields,
+                                         embed=embed, include=include, headers=headers, retry=retry, auth=auth,
+                                         raw=raw)
+        if raw:
+            return response
         response_data = response['data']
         if retrieve_all == True and isinstance(response_data, List) and response['links']['next']:
-            items = response_data
-            while response['links']['next']:
-                response = self.json_api_request(url=response['links']['next'], method="GET",
-                                                 headers=headers, retry=retry,
-                                                 auth=auth)
-                response_data = response['data']
-                items = items + response_data
-            response['data'] = items
+            items = list(response_data)
+            included = list(response.get('included') or [])
+            page_urls = self._remaining_page_urls(response)
+            if page_urls and self.page_workers > 1:
+                for page in self._fetch_pages(page_urls, headers=headers, retry=retry, auth=auth):
+                    items.extend(page['data'])
+                    included.extend(page.get('included') or [])
+            else:
+                while response['links']['next']:
+                    response = self.json_api_request(url=response['links']['next'], method="GET",
+                                                     headers=headers, retry=retry,
+                                                     auth=auth)
+                    items.extend(response['data'])
+                    included.extend(response.get('included') or [])
+            response = self._listing_document(response, items, included)
         return response
 
+    @staticmethod
+    def _listing_document(response, items, included):
+        # Build a new document rather than editing a page another coalesced caller may also hold.
+        document = {**response, 'data': items}
+        if included:
+            document['included'] = included
+        return document
+
+    def iter_pages(self, url, query_parameters=None, page_size=None, headers=None, retry=True, auth=None,
+                   prefetch=True):
+        if page_size:
+            query_parameters = {**(query_parameters or {}), 'page[size]': page_size}
+
+        def fetch(page_url, page_query_parameters=None):
+            return self.json_api_request(url=page_url, method="GET", query_parameters=page_query_parameters,
+                                         headers=headers, retry=retry, auth=auth)
+
+        response = fetch(url, query_parameters)
+        if not prefetch:
+            while response:
+                yield response
+                next_url = self._next_page_url(response)
+                response = fetch(next_url) if next_url else None
+            return
+
+        # Keep one page in flight while the caller works through the current one.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            while response:
+                next_url = self._next_page_url(response)
+                next_page = executor.submit(fetch, next_url) if next_url else None
+                yield response
+                response = next_page.result() if next_page else None
+
+    @staticmethod
+    def _next_page_url(response):
+        if not isinstance(response.get('data'), List):
+            return None
+        links = response.get('links') or {}
+        return links.get('next')
+
+    @staticmethod
+    def _remaining_page_urls(response):
+        links = response.get('links') or {}
+        meta = response.get('meta') or links.get('meta') or {}
+        total = meta.get('total')
+        per_page = meta.get('per_page')
+        next_url = links.get('next')
+        if not (total and per_page and next_url):
+            return None
+        parsed_url = urllib.parse.urlsplit(next_url)
+        query = urllib.parse.parse_qs(parsed_url.query, keep_blank_values=True)
+        if 'page' not in query:
+            return None
+        first_page = int(query['page'][0])
+        last_page = int(math.ceil(total / per_page))
+        page_urls = []
+        for page in range(first_page, last_page + 1):
+            query['page'] = [str(page)]
+            page_query = urllib.parse.urlencode(query, doseq=True)
+            page_urls.append(urllib.parse.urlunsplit(parsed_url._replace(query=page_query)))
+        return page_urls
+
+    def _fetch_pages(self, page_urls, headers=None, retry=True, auth=None):
+        def fetch(page_url):
+            return self.json_api_request(url=page_url, method="GET", headers=headers, retry=retry, auth=auth)
+
+        with ThreadPoolExecutor(max_workers=min(self.page_workers, len(page_urls))) as executor:
+            return list(executor.map(fetch, page_urls))
+
     def post(self, url, item_type=None, query_parameters=None, attributes=None, headers=None, retry=True, auth=None,
              raw_body=None):
         return self.json_api_request(url=url, method="POST", item_type=item_type, attributes=attributes,
@@ -134,11 +463,13 @@ class Session:
                                      retry=retry, raw_body=raw_body, auth=auth)
 
     def delete(self, url, item_type, query_parameters=None, attributes=None, headers=None,
-               retry=True, auth=None):
+               retry=True, auth=None, raw_body=None):
         self.json_api_request(url=url, method="DELETE", item_type=item_type, attributes=attributes,
-                              query_parameters=query_parameters, headers=headers, retry=retry, auth=auth)
+                              query_parameters=query_parameters, headers=headers, retry=retry, auth=auth,
+                              raw_body=raw_body)
         return None
 
     @staticmethod
     def remove_none_items(items):
-        return {key: value for key, value in items.items() if value is not None and key != 'self' and key != 'token'}
+        return {key: value for key, value in items.items()
+                if value is not None and key not in ('self', 'token', 'auth', 'query_parameters')}
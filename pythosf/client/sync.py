@@ -0,0 +1,248 @@
+import datetime
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ..utils import DEFAULT_CHUNK_SIZE, new_hashers, parse_datetime
+from .walker import DEFAULT_WALK_WORKERS, Walker
+
+PUSH = 'push'
+PULL = 'pull'
+
+CREATE_FOLDER = 'create_folder'
+UPLOAD = 'upload'
+UPDATE = 'update'
+DOWNLOAD = 'download'
+DELETE = 'delete'
+
+
+class SyncAction:
+    def __init__(self, action, path, local_path=None, remote=None, size=0):
+        self.action = action
+        self.path = path
+        self.local_path = local_path
+        self.remote = remote
+        self.size = size
+
+    def __repr__(self):
+        return 'SyncAction({!r}, {!r})'.format(self.action, self.path)
+
+
+class SyncReport:
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.actions = []
+        self.completed = []
+        self.failed = []
+        self.unchanged = 0
+        self.bytes_transferred = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record_success(self, sync_action):
+        with self._lock:
+            self.completed.append(sync_action)
+            if sync_action.action in (UPLOAD, UPDATE, DOWNLOAD):
+                self.bytes_transferred += sync_action.size
+
+    def record_failure(self, sync_action, error):
+        with self._lock:
+            self.failed.append((sync_action, error))
+
+    def counts(self):
+        counts = {}
+        for sync_action in self.actions:
+            counts[sync_action.action] = counts.get(sync_action.action, 0) + 1
+        return counts
+
+    def summary(self):
+        counts = ', '.join('{} {}'.format(count, action) for action, count in sorted(self.counts().items()))
+        return '{}{} unchanged; {}; {} failed; {} bytes in {:.1f}s'.format(
+            'DRY RUN: ' if self.dry_run else '', self.unchanged, counts or 'no changes', len(self.failed),
+            self.bytes_transferred, self.seconds)
+
+
+def local_hashes(local_path, names, chunk_size=DEFAULT_CHUNK_SIZE):
+    hashers = new_hashers({name: None for name in names})
+    with open(local_path, 'rb') as local_file:
+        for chunk in iter(lambda: local_file.read(chunk_size), b''):
+            for hasher in hashers.values():
+                hasher.update(chunk)
+    return {name: hasher.hexdigest() for name, hasher in hashers.items()}
+
+
+class DirectorySync:
+    def __init__(self, local_root, remote_folder, direction=PUSH, workers=DEFAULT_WALK_WORKERS, delete=False,
+                 checksum=False, dry_run=False, auth=None):
+        if direction not in (PUSH, PULL):
+            raise ValueError("direction must be '{}' or '{}', not {}".format(PUSH, PULL, direction))
+        self.local_root = os.path.abspath(local_root)
+        self.remote_folder = remote_folder
+        self.direction = direction
+        self.workers = workers
+        self.delete = delete
+        self.checksum = checksum
+        self.dry_run = dry_run
+        self.auth = auth
+        self._remote_folders = {}
+
+    def _local_tree(self):
+        folders, files = set(), {}
+        for directory, directory_names, file_names in os.walk(self.local_root):
+            relative_directory = os.path.relpath(directory, self.local_root)
+            for directory_name in directory_names:
+                folders.add(self._relative(os.path.join(relative_directory, directory_name)))
+            for file_name in file_names:
+                files[self._relative(os.path.join(relative_directory, file_name))] = os.path.join(directory, file_name)
+        return folders, files
+
+    @staticmethod
+    def _relative(path):
+        return os.path.normpath(path).replace(os.sep, '/')
+
+    def _remote_tree(self):
+        folders, files = {'': self.remote_folder}, {}
+        walker = Walker(workers=self.workers, auth=self.auth)
+        for path, item in walker.walk(roots=[('', self.remote_folder)]):
+            relative_path = path.lstrip('/')
+            if getattr(item, 'kind', None) == 'folder':
+                folders[relative_path] = item
+            else:
+                files[relative_path] = item
+        return folders, files
+
+    def _differs(self, local_path, remote_file):
+        local_stat = os.stat(local_path)
+        if local_stat.st_size != getattr(remote_file, 'size', None):
+            return True
+        remote_modified = parse_datetime(getattr(remote_file, 'date_modified', None))
+        local_modified = datetime.datetime.fromtimestamp(local_stat.st_mtime, tz=datetime.timezone.utc)
+        newer = remote_modified is None or (
+            local_modified > remote_modified if self.direction == PUSH else remote_modified > local_modified)
+        if not (newer or self.checksum):
+            return False
+        # Same size but possibly different content: compare hashes locally rather than transferring.
+        computed_hashes = local_hashes(local_path, remote_file.hashes)
+        if not computed_hashes:
+            return newer
+        return any(remote_file.hashes[name] != value for name, value in computed_hashes.items())
+
+    def plan(self):
+        report = SyncReport(dry_run=self.dry_run)
+        local_folders, local_files = self._local_tree()
+        remote_folders, remote_files = self._remote_tree()
+        self._remote_folders = remote_folders
+        actions = []
+        if self.direction == PUSH:
+            for path in sorted(local_folders - set(remote_folders), key=lambda p: p.count('/')):
+                actions.append(SyncAction(CREATE_FOLDER, path))
+            for path, local_path in sorted(local_files.items()):
+                remote_file = remote_files.get(path)
+                if remote_file is None:
+                    actions.append(SyncAction(UPLOAD, path, local_path=local_path,
+                                              size=os.path.getsize(local_path)))
+                elif self._differs(local_path, remote_file):
+                    actions.append(SyncAction(UPDATE, path, local_path=local_path, remote=remote_file,
+                                              size=os.path.getsize(local_path)))
+                else:
+                    report.unchanged += 1
+            if self.delete:
+                actions.extend(self._deletions(set(remote_files) - set(local_files),
+                                               set(remote_folders) - local_folders - {''},
+                                               {**remote_files, **remote_folders}))
+        else:
+            for path in sorted(set(remote_folders) - local_folders - {''}, key=lambda p: p.count('/')):
+                actions.append(SyncAction(CREATE_FOLDER, path))
+            for path, remote_file in sorted(remote_files.items()):
+                local_path = os.path.join(self.local_root, *path.split('/'))
+                if path not in local_files or self._differs(local_path, remote_file):
+                    actions.append(SyncAction(DOWNLOAD, path, local_path=local_path, remote=remote_file,
+                                              size=getattr(remote_file, 'size', None) or 0))
+                else:
+                    report.unchanged += 1
+            if self.delete:
+                actions.extend(self._deletions(set(local_files) - set(remote_files),
+                                               local_folders - set(remote_folders), local_files))
+        report.actions = actions
+        return report
+
+    def _deletions(self, file_paths, folder_paths, items):
+        # Deleting a folder removes its contents, so only delete the top-most missing entries.
+        deleted_folders = sorted(folder_paths, key=lambda p: p.count('/'))
+        top_folders = []
+        for path in deleted_folders:
+            if not any(path.startswith(folder + '/') for folder in top_folders):
+                top_folders.append(path)
+        actions = []
+        for path in sorted(file_paths) + top_folders:
+            if any(path.startswith(folder + '/') for folder in top_folders):
+                continue
+            local_path = os.path.join(self.local_root, *path.split('/'))
+            actions.append(SyncAction(DELETE, path, local_path=local_path, remote=items.get(path)))
+        return actions
+
+    def run(self):
+        started = time.monotonic()
+        report = self.plan()
+        if not self.dry_run:
+            self._apply(report, self._remote_folders)
+        report.seconds = time.monotonic() - started
+        logging.log(logging.INFO, report.summary())
+        return report
+
+    def _apply(self, report, remote_folders):
+        folder_actions = [a for a in report.actions if a.action == CREATE_FOLDER]
+        transfer_actions = [a for a in report.actions if a.action in (UPLOAD, UPDATE, DOWNLOAD)]
+        delete_actions = [a for a in report.actions if a.action == DELETE]
+        # Parents must exist before children, so folders are created one depth level at a time.
+        for depth in sorted({a.path.count('/') for a in folder_actions}):
+            level = [a for a in folder_actions if a.path.count('/') == depth]
+            self._run_all(report, level, lambda a: self._create_folder(a, remote_folders))
+        self._run_all(report, transfer_actions, lambda a: self._transfer(a, remote_folders))
+        self._run_all(report, delete_actions, self._delete)
+
+    def _run_all(self, report, sync_actions, apply):
+        def run_one(sync_action):
+            try:
+                apply(sync_action)
+            except Exception as e:
+                logging.log(logging.ERROR, 'Sync of {} failed: {}'.format(sync_action.path, e))
+                report.record_failure(sync_action, e)
+            else:
+                report.record_success(sync_action)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(run_one, sync_actions))
+
+    @staticmethod
+    def _split(path):
+        parent, _, name = path.rpartition('/')
+        return parent, name
+
+    def _create_folder(self, sync_action, remote_folders):
+        if self.direction == PULL:
+            os.makedirs(os.path.join(self.local_root, *sync_action.path.split('/')), exist_ok=True)
+            return
+        parent, name = self._split(sync_action.path)
+        remote_folders[sync_action.path] = remote_folders[parent].create(name=name, auth=self.auth)
+
+    def _transfer(self, sync_action, remote_folders):
+        if sync_action.action == DOWNLOAD:
+            sync_action.remote.download(to=sync_action.local_path, auth=self.auth)
+            return
+        with open(sync_action.local_path, 'rb') as local_file:
+            if sync_action.action == UPDATE:
+                sync_action.remote.upload(data=local_file, auth=self.auth)
+            else:
+                parent, name = self._split(sync_action.path)
+                remote_folders[parent].upload(name=name, data=local_file, auth=self.auth)
+
+    def _delete(self, sync_action):
+        if self.direction == PUSH:
+            sync_action.remote.delete(auth=self.auth)
+        elif os.path.isdir(sync_action.local_path):
+            shutil.rmtree(sync_action.local_path)
+        else:
+            os.remove(sync_action.local_path)
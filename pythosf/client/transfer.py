@@ -0,0 +1,145 @@
+import threading
+import time
+from .batch import DEFAULT_BATCH_WORKERS, run_concurrently
+
+MOVE = 'move'
+COPY = 'copy'
+DELETE = 'delete'
+
+# How OSF metadata is refreshed after WaterButler moves or copies a file.
+REFRESH_EACH = 'each'
+REFRESH_DEFER = 'defer'
+REFRESH_SKIP = 'skip'
+
+
+class TransferOperation:
+    def __init__(self, file, to_folder=None, action=MOVE, conflict=None, rename=None):
+        if action not in (MOVE, COPY, DELETE):
+            raise ValueError("action must be one of {}, not {}".format((MOVE, COPY, DELETE), action))
+        if action != DELETE and to_folder is None:
+            raise ValueError("{} needs a destination folder".format(action))
+        self.file = file
+        self.to_folder = to_folder
+        self.action = action
+        self.conflict = conflict
+        self.rename = rename
+
+    def __repr__(self):
+        return 'TransferOperation({!r}, {!r})'.format(self.action, getattr(self.file, 'name', None))
+
+
+class TransferProgress:
+    def __init__(self, total):
+        self.total = total
+        self.completed = 0
+        self.failed = 0
+        self.bytes = 0
+        # Operation index -> error for transfers that succeeded but whose deferred metadata refresh did not.
+        self.refresh_errors = {}
+        self.started = time.monotonic()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def record(self, operation, ok):
+        with self._lock:
+            if ok:
+                self.completed += 1
+                if operation.action != DELETE:
+                    self.bytes += getattr(operation.file, 'size', None) or 0
+            else:
+                self.failed += 1
+
+    @property
+    def done(self):
+        return self.completed + self.failed
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def operations_per_second(self):
+        return self.done / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def bytes_per_second(self):
+        return self.bytes / self.elapsed if self.elapsed else 0.0
+
+    def __repr__(self):
+        return 'TransferProgress({}/{} done, {} failed, {:.1f} ops/s, {:.0f} B/s)'.format(
+            self.done, self.total, self.failed, self.operations_per_second, self.bytes_per_second)
+
+
+class TransferManager:
+    def __init__(self, workers=DEFAULT_BATCH_WORKERS, refresh=REFRESH_DEFER, on_progress=None, auth=None):
+        if refresh not in (REFRESH_EACH, REFRESH_DEFER, REFRESH_SKIP):
+            raise ValueError("refresh must be one of {}, not {}".format(
+                (REFRESH_EACH, REFRESH_DEFER, REFRESH_SKIP), refresh))
+        self.workers = workers
+        self.refresh = refresh
+        self.on_progress = on_progress
+        self.auth = auth
+        self.progress = None
+
+    def run(self, operations):
+        # Returns one BatchResult per operation, in order: the moved file, the new copy, or None for deletes.
+        operations = list(operations)
+        self.progress = TransferProgress(total=len(operations))
+        calls = [(self._apply, (operation,), {}) for operation in operations]
+        results = run_concurrently(calls, workers=self.workers)
+        if self.refresh == REFRESH_DEFER:
+            self._refresh(operations, results)
+        self.progress.finished = time.monotonic()
+        return results
+
+    def _apply(self, operation):
+        try:
+            result = self._transfer(operation)
+        except Exception:
+            self._report(operation, ok=False)
+            raise
+        self._report(operation, ok=True)
+        return result
+
+    def _transfer(self, operation):
+        refresh = self.refresh == REFRESH_EACH
+        if operation.action == DELETE:
+            return operation.file.delete(auth=self.auth)
+        if operation.action == MOVE:
+            operation.file.move(to_folder=operation.to_folder, rename=operation.rename,
+                                conflict=operation.conflict, auth=self.auth, refresh=refresh)
+            return operation.file
+        return operation.file.copy(to_folder=operation.to_folder, rename=operation.rename,
+                                   conflict=operation.conflict, auth=self.auth, refresh=refresh)
+
+    def _report(self, operation, ok):
+        self.progress.record(operation, ok=ok)
+        if self.on_progress is not None:
+            self.on_progress(self.progress)
+
+    def _refresh(self, operations, results):
+        # One listing per destination folder replaces a metadata request per transferred file.
+        by_folder = {}
+        for index, (operation, result) in enumerate(zip(operations, results)):
+            if operation.action == DELETE or not result.ok:
+                continue
+            folder, folder_files, indexes = by_folder.setdefault(id(operation.to_folder),
+                                                                 (operation.to_folder, {}, []))
+            folder_files[result.value.name] = result.value
+            indexes.append(index)
+
+        def refresh_folder(folder, files):
+            url = folder.relationships.files['links']['related']['href']
+            for page in folder.session.iter_pages(url=url, auth=self.auth):
+                for data in page['data']:
+                    file = files.get(data['attributes']['name'])
+                    if file is not None:
+                        file._update(response=data)
+
+        folders = list(by_folder.values())
+        calls = [(refresh_folder, (folder, files), {}) for folder, files, indexes in folders]
+        for (folder, files, indexes), refreshed in zip(folders, run_concurrently(calls, workers=self.workers)):
+            if not refreshed.ok:
+                # The files were transferred; only their metadata may be stale.
+                for index in indexes:
+                    self.progress.refresh_errors[index] = refreshed.error
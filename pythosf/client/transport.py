@@ -0,0 +1,154 @@
+import http.cookiejar
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPConnectionPool, HTTPSConnectionPool, PoolManager
+
+
+TRANSPORT_CONFIG_KEYS = ('pool_connections', 'pool_maxsize', 'pool_block', 'keep_alive', 'timeout')
+
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.connection_count = 0
+
+    def record_request(self):
+        with self._lock:
+            self.request_count += 1
+
+    def record_connection(self):
+        with self._lock:
+            self.connection_count += 1
+
+    @property
+    def pool_hit_count(self):
+        return max(self.request_count - self.connection_count, 0)
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    stats = None
+
+    def _new_conn(self):
+        if self.stats is not None:
+            self.stats.record_connection()
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    stats = None
+
+    def _new_conn(self):
+        if self.stats is not None:
+            self.stats.record_connection()
+        return super()._new_conn()
+
+
+class _CountingPoolManager(PoolManager):
+    def __init__(self, *args, stats=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = stats
+        self.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context=request_context)
+        pool.stats = self.stats
+        return pool
+
+
+class _CountingHTTPAdapter(HTTPAdapter):
+    def __init__(self, stats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _CountingPoolManager(num_pools=connections, maxsize=maxsize, block=block,
+                                                stats=self.stats, **pool_kwargs)
+
+    def send(self, request, **kwargs):
+        self.stats.record_request()
+        return super().send(request, **kwargs)
+
+
+class _BlockAllCookies(http.cookiejar.CookiePolicy):
+    # Nothing is stored in or sent from the pooled session's cookie jar, so sharing a pool never shares
+    # authentication state between calls or between tokens.
+    netscape = True
+    rfc2965 = False
+    hide_cookie2 = False
+
+    def set_ok(self, cookie, request):
+        return False
+
+    def return_ok(self, cookie, request):
+        return False
+
+    def domain_return_ok(self, domain, request):
+        return False
+
+    def path_return_ok(self, path, request):
+        return False
+
+
+class Transport:
+    def __init__(self, pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True, timeout=None):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.stats = PoolStats()
+        self._http = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config=None):
+        config = config or {}
+        return cls(**{key: config[key] for key in TRANSPORT_CONFIG_KEYS if key in config})
+
+    @property
+    def http(self):
+        # The pool is built on first use so an unused or closed transport holds no sockets.
+        if self._http is None:
+            with self._lock:
+                if self._http is None:
+                    self._http = self._build_http_session()
+        return self._http
+
+    def _build_http_session(self):
+        http = requests.Session()
+        http.cookies.set_policy(_BlockAllCookies())
+        adapter = _CountingHTTPAdapter(stats=self.stats, pool_connections=self.pool_connections,
+                                       pool_maxsize=self.pool_maxsize, pool_block=self.pool_block)
+        http.mount('https://', adapter)
+        http.mount('http://', adapter)
+        if not self.keep_alive:
+            http.headers['Connection'] = 'close'
+        return http
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.http.request(method, url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            if self._http is not None:
+                self._http.close()
+                self._http = None
+
+    def __reduce__(self):
+        # Only the settings are pickled; the receiving process builds its own pool on first use.
+        return type(self), (self.pool_connections, self.pool_maxsize, self.pool_block, self.keep_alive, self.timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
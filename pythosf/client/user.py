@@ -11,7 +11,11 @@ class User(APIDetail):
             self.meta = None
             self.self_link = self_link
 
-    def get(self, query_parameters=None, auth=None):
+    def _embed_factories(self):
+        from .node import Node
+        return {'nodes': ('nodes', Node)}
+
+    def get(self, query_parameters=None, auth=None, fields=None, embed=None, include=None):
         url = '/v2/users/me/'
         if self.self_link:
             url = self.self_link
@@ -21,7 +25,7 @@ class User(APIDetail):
             url = '/v2/users/{}/'.format(self.id)
 
         response = self.session.get(
-            url=url, query_parameters=query_parameters, auth=auth)
+            url=url, query_parameters=query_parameters, auth=auth, fields=fields, embed=embed, include=include)
         if response:
             self._update(response=response)
         else:
@@ -0,0 +1,107 @@
+import fnmatch
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DEFAULT_WALK_WORKERS = 8
+
+
+class LevelStats:
+    def __init__(self):
+        self.folders = 0
+        self.entries = 0
+        self.seconds = 0.0
+
+    def __repr__(self):
+        return 'LevelStats(folders={}, entries={}, seconds={:.3f})'.format(self.folders, self.entries, self.seconds)
+
+
+class WalkStats:
+    def __init__(self):
+        self.levels = {}
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def record(self, depth, entries, seconds):
+        with self._lock:
+            level = self.levels.setdefault(depth, LevelStats())
+            level.folders += 1
+            level.entries += entries
+            level.seconds += seconds
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+
+def matches_any(name, patterns):
+    return any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+
+
+def _as_patterns(patterns):
+    if patterns is None:
+        return ()
+    if isinstance(patterns, str):
+        return (patterns,)
+    return tuple(patterns)
+
+
+def join_path(parent_path, name):
+    return '{}/{}'.format(parent_path.rstrip('/'), name)
+
+
+class Walker:
+    def __init__(self, workers=DEFAULT_WALK_WORKERS, max_depth=None, include=None, exclude=None, page_size=None,
+                 stats=None, auth=None, index=None):
+        self.workers = workers
+        self.max_depth = max_depth
+        self.include = _as_patterns(include)
+        self.exclude = _as_patterns(exclude)
+        self.page_size = page_size
+        self.stats = stats if stats is not None else WalkStats()
+        self.auth = auth
+        self.index = index
+
+    def _list(self, folder, depth):
+        started = time.monotonic()
+        entries = list(folder.iter_files(auth=self.auth, page_size=self.page_size, prefetch=False))
+        index = self.index if self.index is not None else getattr(folder.session, 'index', None)
+        if index is not None:
+            index.add_listing(folder, entries)
+        self.stats.record(depth=depth, entries=len(entries), seconds=time.monotonic() - started)
+        return entries
+
+    def _should_descend(self, item, depth):
+        if getattr(item, 'kind', None) != 'folder':
+            return False
+        return self.max_depth is None or depth < self.max_depth
+
+    def walk(self, roots):
+        # roots is an iterable of (path, folder) pairs; their children are listed at depth 0.
+        self.stats.started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = {}
+            for path, folder in roots:
+                pending[executor.submit(self._list, folder, 0)] = (path, 0)
+            try:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        parent_path, depth = pending.pop(future)
+                        for item in future.result():
+                            name = getattr(item, 'name', '')
+                            if matches_any(name, self.exclude):
+                                continue
+                            path = join_path(parent_path, name)
+                            if not self.include or matches_any(name, self.include):
+                                yield path, item
+                            if self._should_descend(item, depth):
+                                pending[executor.submit(self._list, item, depth + 1)] = (path, depth + 1)
+            finally:
+                # Stop queued listings if the caller abandons the walk early.
+                for future in pending:
+                    future.cancel()
+        self.stats.finished = time.monotonic()
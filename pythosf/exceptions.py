@@ -7,4 +7,8 @@ class APITimeoutWithoutRetry(Exception):
 
 
 class UnsupportedMethod(Exception):
-    pass
\ No newline at end of file
+    pass
+
+
+class ChecksumMismatch(Exception):
+    pass
@@ -1,4 +1,10 @@
-from requests_oauthlib import OAuth2
+import datetime
+import hashlib
+import mmap
+from . import exceptions
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
 
 def combine_headers(header_one, header_two):
     if header_two is None:
@@ -21,9 +27,113 @@ def unwrap_data(response):
         return response
 
 
+def json_api_parameters(query_parameters=None, fields=None, embed=None, include=None):
+    # fields maps a resource type to the attributes to return, e.g. {'files': ['name', 'size']}.
+    parameters = dict(query_parameters or {})
+    for item_type, names in (fields or {}).items():
+        parameters['fields[{}]'.format(item_type)] = names if isinstance(names, str) else ','.join(names)
+    if embed:
+        parameters['embed'] = [embed] if isinstance(embed, str) else list(embed)
+    if include:
+        parameters['include'] = include if isinstance(include, str) else ','.join(include)
+    return parameters or None
+
+
+def parse_datetime(value):
+    # OSF reports naive ISO-8601 timestamps in UTC; WaterButler sometimes adds an offset or a trailing Z.
+    if not value:
+        return None
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    parsed = datetime.datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed
+
+
+def auth_headers(auth, method, url):
+    # Let a requests-style auth object (bearer_token_auth, OAuth2) sign a throwaway request to read its headers.
+    if auth is None:
+        return {}
+    import requests
+    prepared = requests.Request(method=method, url=url).prepare()
+    prepared = auth(prepared)
+    return {key: value for key, value in prepared.headers.items() if key.lower() == 'authorization'}
+
+
 def bearer_token_auth(token):
+    # requests_oauthlib is slow to import, so it is only loaded when OAuth2 auth is actually built.
+    from requests_oauthlib import OAuth2
     token_dict = {
         'token_type': 'Bearer',
         'access_token': token
     }
     return OAuth2(token=token_dict)
+
+
+class BearerAuth:
+    # A requests auth callable that adds 'Authorization: Bearer <token>' without needing oauthlib. Unlike
+    # bearer_token_auth it does not refuse plain-http URLs.
+    def __init__(self, token):
+        self.token = token
+
+    def __call__(self, request):
+        request.headers['Authorization'] = 'Bearer {}'.format(self.token)
+        return request
+
+    def __eq__(self, other):
+        return isinstance(other, BearerAuth) and other.token == self.token
+
+    def __hash__(self):
+        return hash(self.token)
+
+    def __repr__(self):
+        return 'BearerAuth(<token>)'
+
+
+def new_hashers(expected_hashes):
+    expected_hashes = expected_hashes or {}
+    return {name: hashlib.new(name) for name in expected_hashes if name in hashlib.algorithms_available}
+
+
+def verify_hashes(hashers, expected_hashes):
+    for name, hasher in hashers.items():
+        actual = hasher.hexdigest()
+        if actual != expected_hashes[name]:
+            raise exceptions.ChecksumMismatch(
+                "{} mismatch: expected {}, got {}".format(name, expected_hashes[name], actual))
+
+
+class BufferReader:
+    # File-like view over a bytes-like buffer (mmap, memoryview, bytearray) so uploads read it in chunks.
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast('B')
+        self._position = 0
+
+    def __len__(self):
+        return len(self._view)
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = len(self._view) - self._position
+        chunk = self._view[self._position:self._position + size]
+        self._position += len(chunk)
+        return chunk.tobytes()
+
+    def seek(self, offset, whence=0):
+        if whence == 0:
+            self._position = offset
+        elif whence == 1:
+            self._position += offset
+        else:
+            self._position = len(self._view) + offset
+        return self._position
+
+    def tell(self):
+        return self._position
+
+
+def upload_body(data):
+    if isinstance(data, (mmap.mmap, memoryview, bytearray)):
+        return BufferReader(data)
+    return data
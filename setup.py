@@ -70,6 +70,12 @@ setup(
     # https://packaging.python.org/en/latest/requirements.html
     install_requires=required,
 
+    # Optional dependencies, installed with e.g. `pip install pythosf[async]`.
+    extras_require={
+        'async': ['aiohttp'],
+        'fast': ['orjson'],
+    },
+
     # To provide executable scripts, use entry points in preference to the
     # "scripts" keyword. Entry points provide cross-platform support and allow
     # pip to create the appropriate form of executable for the target platform.
@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+import requests
+
+from pythosf import exceptions
+from pythosf.client.aio import AsyncSession
+from pythosf.client import instrumentation
+from pythosf.client.cache import MemoryCache
+from pythosf.client.instrumentation import LatencyAggregator
+from pythosf.client.retry import RetryPolicy
+
+
+def run(coroutine_function, server, **config):
+    async def main():
+        async with AsyncSession(api_base_url=server.url,
+                                config={'retry_policy': RetryPolicy(backoff_base=0), **config}) as session:
+            return await coroutine_function(session)
+    return asyncio.run(main())
+
+
+def test_server_errors_are_retried_and_then_raised(local_server):
+    statuses = [503, 200]
+    server = local_server(lambda request: (statuses.pop(0), {}, {'data': {'id': 'abc12'}}))
+
+    async def fetch(session):
+        return await session.get('v2/nodes/abc12/')
+
+    assert run(fetch, server) == {'data': {'id': 'abc12'}}
+    assert len(server.requests) == 2
+
+    failing = local_server(lambda request: (404, {}, {'errors': []}))
+    with pytest.raises(requests.exceptions.HTTPError) as error:
+        run(fetch, failing)
+    assert error.value.response.status_code == 404
+
+
+def test_retrieve_all_merges_every_page(local_server):
+    def respond(request):
+        if 'page=2' in request.path:
+            return 200, {}, {'data': [{'id': 'b'}], 'links': {'next': None}}
+        return 200, {}, {'data': [{'id': 'a'}], 'links': {'next': server.url + 'v2/nodes/?page=2'}}
+    server = local_server(respond)
+
+    async def fetch(session):
+        return await session.get('v2/nodes/', retrieve_all=True)
+
+    response = run(fetch, server, page_workers=1)
+    assert [item['id'] for item in response['data']] == ['a', 'b']
+    assert response['links'] == {'next': None}
+
+
+@pytest.mark.parametrize('call', [
+    lambda session: session.stream('v2/nodes/'),
+    lambda session: session.batch(),
+])
+def test_blocking_session_methods_are_refused(local_server, call):
+    server = local_server(lambda request: (200, {}, {}))
+
+    async def attempt(session):
+        with pytest.raises(exceptions.UnsupportedMethod):
+            call(session)
+    run(attempt, server)
+
+
+def test_cache_revalidates_and_is_invalidated_by_writes(local_server):
+    def respond(request):
+        if request.method == 'PATCH':
+            return 200, {}, {'data': {'id': 'abc12', 'attributes': {'title': 'new'}}}
+        if request.headers.get('If-None-Match') == '"v1"':
+            return 304, {'ETag': '"v1"'}, b''
+        return 200, {'ETag': '"v1"'}, {'data': {'id': 'abc12', 'attributes': {'title': 'old'}}}
+    server = local_server(respond)
+
+    async def fetch(session):
+        first = await session.get('v2/nodes/abc12/')
+        second = await session.get('v2/nodes/abc12/')
+        await session.patch('v2/nodes/abc12/', item_id='abc12', item_type='nodes', attributes={'title': 'new'})
+        third = await session.get('v2/nodes/abc12/')
+        return first, second, third, dict(session.cache.stats)
+
+    first, second, third, stats = run(fetch, server, cache=MemoryCache(ttl=0))
+    assert first == second == third
+    assert [request.headers.get('If-None-Match') for request in server.requests if request.method == 'GET'] == [
+        None, '"v1"', None]
+    assert stats['revalidations'] == 1
+
+
+def test_coalesce_shares_one_request_between_tasks(local_server):
+    server = local_server(lambda request: (200, {}, {'data': {'id': 'abc12'}}))
+
+    async def fetch(session):
+        return await asyncio.gather(*[session.get('v2/nodes/abc12/') for _ in range(5)])
+
+    responses = run(fetch, server, coalesce=True)
+    assert len(server.requests) == 1
+    assert all(response is responses[0] for response in responses)
+
+
+def test_emits_the_same_request_events_as_session(local_server):
+    statuses = [503, 200]
+    server = local_server(lambda request: (statuses.pop(0), {}, {'data': {'id': 'abc12'}}))
+    events = []
+    latencies = LatencyAggregator()
+
+    async def fetch(session):
+        for event in instrumentation.EVENTS:
+            session.add_hook(event, events.append)
+        latencies.attach(session)
+        return await session.get('v2/nodes/abc12/')
+
+    run(fetch, server)
+    assert [(event.event, event.retry_count) for event in events] == [
+        (instrumentation.BEFORE_REQUEST, 0),
+        (instrumentation.AFTER_RESPONSE, 0),
+        (instrumentation.RETRY, 1),
+        (instrumentation.BEFORE_REQUEST, 1),
+        (instrumentation.AFTER_RESPONSE, 1),
+        (instrumentation.DECODE, 0),
+    ]
+    assert [event.status for event in events if event.event == instrumentation.AFTER_RESPONSE] == [503, 200]
+    summary = latencies.summary()['GET /v2/nodes/{id}/']
+    assert summary['count'] == 2
+    assert summary['retries'] == 1
@@ -0,0 +1,27 @@
+import time
+
+from pythosf.client.batch import run_in_processes
+
+
+def test_ordered_results_held_back_count_against_max_pending():
+    # The first item is slow, so later ones finish first and have to wait for it to be yielded in order.
+    durations = [0.5] + [0.0] * 11
+    drawn = []
+
+    def items():
+        for duration in durations:
+            drawn.append(duration)
+            yield duration
+
+    outstanding = []
+    for result in run_in_processes(time.sleep, items(), workers=2, ordered=True, max_pending=3):
+        assert result.ok
+        outstanding.append(len(drawn) - result.index)
+
+    assert len(outstanding) == len(durations)
+    assert max(outstanding) <= 3
+
+
+def test_unordered_results_keep_every_index():
+    results = list(run_in_processes(abs, [-1, -2, -3, -4], workers=2))
+    assert sorted((result.index, result.value) for result in results) == [(0, 1), (1, 2), (2, 3), (3, 4)]
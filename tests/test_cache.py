@@ -0,0 +1,33 @@
+from pythosf.client.cache import CacheEntry, MemoryCache, osf_urls_for_write
+
+API = 'https://api.osf.io/'
+WB = 'https://files.osf.io/v1/resources/abc12/providers/'
+
+
+def cached(*urls):
+    cache = MemoryCache()
+    for number, url in enumerate(urls):
+        cache.set(str(number), CacheEntry(url=url, body=b'{}'))
+    return cache
+
+
+def test_upload_invalidates_osf_listings_of_the_node():
+    cache = cached(API + 'v2/nodes/abc12/files/osfstorage/5e1f/', API + 'v2/nodes/abc12/files/',
+                   API + 'v2/nodes/other/files/osfstorage/')
+    for url in osf_urls_for_write(API, WB + 'osfstorage/5e1f/?kind=file&name=new.csv'):
+        cache.invalidate(url)
+    assert [entry.url for entry in cache._entries.values()] == [API + 'v2/nodes/other/files/osfstorage/']
+
+
+def test_move_invalidates_source_file_and_destination_node():
+    document = {'data': {'attributes': {'resource': 'xyz89', 'provider': 'osfstorage', 'path': '/77bb'}}}
+    urls = osf_urls_for_write(API, WB + 'osfstorage/66aa', document)
+    assert API + 'v2/files/66aa' in urls
+    assert API + 'v2/nodes/abc12/files/' in urls
+    assert API + 'v2/nodes/xyz89/files/' in urls
+    assert API + 'v2/files/77bb' in urls
+
+
+def test_osf_write_only_invalidates_its_own_url():
+    assert osf_urls_for_write(API, API + 'v2/nodes/abc12/', {'data': {'attributes': {'title': 'x'}}}) == [
+        API + 'v2/nodes/abc12/']
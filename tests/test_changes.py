@@ -0,0 +1,21 @@
+import pytest
+
+from pythosf.client.changes import _log_locations
+
+
+@pytest.mark.parametrize('action, params, expected', [
+    ('osf_storage_file_added', {'path': '/data/a.csv'}, (None, ('osfstorage', '/data/'), None)),
+    ('github_file_updated', {'path': '/src/main.py'}, (None, ('github', '/src/'), None)),
+    ('googledrive_file_removed', {'path': '/notes.txt'}, (('googledrive', '/notes.txt'), None, None)),
+    ('box_folder_created', {'path': '/results/'}, (None, None, ('box', '/results/'))),
+    ('node_created', {'path': '/'}, (None, None, None)),
+])
+def test_log_locations_reads_provider_from_action(action, params, expected):
+    assert _log_locations(action, params) == expected
+
+
+def test_log_locations_for_move():
+    params = {'source': {'provider': 'osfstorage', 'materialized': '/a.csv'},
+              'destination': {'provider': 'dropbox', 'materialized': '/archive/a.csv'}}
+    assert _log_locations('addon_file_moved', params) == (
+        ('osfstorage', '/a.csv'), ('dropbox', '/archive/'), None)
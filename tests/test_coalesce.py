@@ -0,0 +1,125 @@
+import asyncio
+import threading
+import time
+
+from pythosf.client.coalesce import SingleFlight
+
+CALLERS = 8
+
+
+class BlockingFetch:
+    # Stands in for a request: every call blocks until release() so concurrent callers overlap.
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.started = threading.Event()
+        self._release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        self._release.wait(timeout=5)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def release(self):
+        self._release.set()
+
+
+def run_concurrently(single_flight, fetch, key='key', url='https://api.osf.io/v2/nodes/abc12/'):
+    outcomes = [None] * CALLERS
+
+    def call(index):
+        try:
+            outcomes[index] = single_flight.do(key, url, fetch)
+        except Exception as e:
+            outcomes[index] = e
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(CALLERS)]
+    threads[0].start()
+    assert fetch.started.wait(timeout=5)
+    for thread in threads[1:]:
+        thread.start()
+    # Waiters register before they block, so once every one is counted the call can finish.
+    deadline = time.monotonic() + 5
+    while single_flight.coalesced < CALLERS - 1 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    fetch.release()
+    for thread in threads:
+        thread.join(timeout=5)
+    return outcomes
+
+
+def test_concurrent_callers_share_one_call_and_result():
+    single_flight = SingleFlight()
+    result = {'data': {'id': 'abc12'}}
+    fetch = BlockingFetch(result=result)
+
+    outcomes = run_concurrently(single_flight, fetch)
+
+    assert fetch.calls == 1
+    assert all(outcome is result for outcome in outcomes)
+
+
+def test_concurrent_callers_share_the_exception():
+    single_flight = SingleFlight()
+    error = ValueError('request failed')
+    fetch = BlockingFetch(error=error)
+
+    outcomes = run_concurrently(single_flight, fetch)
+
+    assert fetch.calls == 1
+    assert all(outcome is error for outcome in outcomes)
+    # A failed call is not remembered; the next caller tries again.
+    assert single_flight.do('key', 'https://api.osf.io/v2/nodes/abc12/', lambda: 'retried') == 'retried'
+
+
+def test_counts_are_kept_per_endpoint():
+    single_flight = SingleFlight()
+    fetch = BlockingFetch(result='node')
+    run_concurrently(single_flight, fetch, key='abc12', url='https://api.osf.io/v2/nodes/abc12/')
+    single_flight.do('xyz34', 'https://api.osf.io/v2/nodes/xyz34/', lambda: 'node')
+    single_flight.do('files', 'https://api.osf.io/v2/nodes/abc12/files/', lambda: 'files')
+
+    assert single_flight.summary() == {
+        '/v2/nodes/{id}/': {'requests': 2, 'coalesced': CALLERS - 1},
+        '/v2/nodes/{id}/files/': {'requests': 1, 'coalesced': 0},
+    }
+
+
+def test_async_callers_share_one_call():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {'data': []}
+
+    async def main():
+        return await asyncio.gather(*[
+            single_flight.do_async('key', 'https://api.osf.io/v2/nodes/', fetch) for _ in range(CALLERS)])
+
+    outcomes = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(outcome is outcomes[0] for outcome in outcomes)
+    assert single_flight.summary() == {'/v2/nodes/': {'requests': 1, 'coalesced': CALLERS - 1}}
+
+
+def test_async_callers_share_the_exception():
+    single_flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise ValueError('request failed')
+
+    async def main():
+        return await asyncio.gather(*[
+            single_flight.do_async('key', 'https://api.osf.io/v2/nodes/', fetch) for _ in range(CALLERS)],
+            return_exceptions=True)
+
+    outcomes = asyncio.run(main())
+    assert isinstance(outcomes[0], ValueError)
+    assert all(outcome is outcomes[0] for outcome in outcomes)
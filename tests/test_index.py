@@ -0,0 +1,61 @@
+from pythosf.client import File, Provider, Session
+from pythosf.client.index import MetadataIndex, node_id_of
+
+API = 'https://api.osf.io/'
+
+# As returned by GET /v2/nodes/abc12/files/: providers have no node relationship.
+PROVIDER = {
+    'id': 'abc12:osfstorage',
+    'type': 'files',
+    'attributes': {'name': 'osfstorage', 'kind': 'folder', 'path': '/', 'node': 'abc12', 'provider': 'osfstorage'},
+    'relationships': {
+        'files': {'links': {'related': {
+            'href': API + 'v2/nodes/abc12/files/osfstorage/', 'meta': {}}}},
+    },
+    'links': {
+        'upload': 'https://files.osf.io/v1/resources/abc12/providers/osfstorage/',
+        'new_folder': 'https://files.osf.io/v1/resources/abc12/providers/osfstorage/?kind=folder',
+        'storage_addons': API + 'v2/addons/?filter%5Bcategories%5D=storage',
+    },
+}
+
+FILE = {
+    'id': '5e1f0a',
+    'type': 'files',
+    'attributes': {
+        'name': 'data.csv', 'kind': 'file', 'path': '/5e1f0a', 'materialized_path': '/data.csv',
+        'provider': 'osfstorage', 'size': 12, 'date_modified': '2020-01-01T00:00:00.000000',
+        'extra': {'hashes': {'md5': 'abc', 'sha256': 'def'}},
+    },
+    'relationships': {
+        'target': {'links': {'related': {'href': API + 'v2/nodes/abc12/', 'meta': {'type': 'node'}}},
+                   'data': {'type': 'nodes', 'id': 'abc12'}},
+    },
+    'links': {'download': 'https://osf.io/download/5e1f0a/'},
+}
+
+
+def test_node_id_of_provider_without_node_relationship():
+    provider = Provider(session=Session(api_base_url=API), data={'data': PROVIDER})
+    assert node_id_of(provider) == 'abc12'
+
+
+def test_node_id_of_provider_from_files_link():
+    attributes = {key: value for key, value in PROVIDER['attributes'].items() if key != 'node'}
+    provider = Provider(session=Session(api_base_url=API), data={'data': {**PROVIDER, 'attributes': attributes}})
+    assert node_id_of(provider) == 'abc12'
+
+
+def test_node_id_of_file_with_target_relationship():
+    assert node_id_of(File(session=Session(api_base_url=API), data={'data': FILE})) == 'abc12'
+
+
+def test_add_listing_for_real_provider_payload():
+    session = Session(api_base_url=API)
+    provider = Provider(session=session, data={'data': PROVIDER})
+    index = MetadataIndex(session=session)
+    index.add_listing(provider, [File(session=session, data={'data': FILE})])
+
+    found = index.lookup('/data.csv', node='abc12', provider='osfstorage')
+    assert found is not None and found.id == '5e1f0a'
+    assert [item.name for item in index.children('/', node='abc12', provider='osfstorage')] == ['data.csv']
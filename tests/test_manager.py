@@ -0,0 +1,44 @@
+import pytest
+
+from pythosf.client import SessionManager
+from pythosf.client.index import MetadataIndex
+
+
+def respond_with_cookie(request):
+    token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    return 200, {'Set-Cookie': 'osf=session-of-{}; Path=/'.format(token)}, {'data': {}}
+
+
+def test_tokens_never_see_each_others_cookies(local_server):
+    server = local_server(respond_with_cookie)
+    manager = SessionManager(api_base_url=server.url)
+    manager.session('a').get(url=server.url)
+    manager.session('b').get(url=server.url)
+    manager.session('a').get(url=server.url)
+
+    assert [request.headers['Authorization'] for request in server.requests] == [
+        'Bearer a', 'Bearer b', 'Bearer a']
+    assert all('Cookie' not in request.headers for request in server.requests)
+
+
+def test_closing_a_managed_session_keeps_the_shared_pool(local_server):
+    server = local_server(lambda request: (200, {}, {'data': {}}))
+    manager = SessionManager(api_base_url=server.url)
+    with manager.session('a') as session:
+        session.get(url=server.url)
+    assert manager.transport._http is not None
+
+
+def test_shared_index_is_refused():
+    with pytest.raises(ValueError):
+        SessionManager(api_base_url='https://api.osf.io/', config={'index': MetadataIndex()})
+
+
+def test_idle_and_lru_eviction():
+    manager = SessionManager(api_base_url='https://api.osf.io/', max_sessions=2)
+    first = manager.session('a')
+    manager.session('b')
+    manager.session('c')
+    assert 'a' not in manager and len(manager) == 2
+    assert manager.session('a') is not first
+    assert manager.evicted_count == 2
@@ -0,0 +1,59 @@
+import json
+import time
+
+from pythosf.client import Node, Session
+from pythosf.client.retry import RetryPolicy
+
+
+def node_document(title):
+    return {'id': 'n-{}'.format(title), 'type': 'nodes', 'attributes': {'title': title}}
+
+
+def bulk_server(local_server, bulk_status=None, bulk_delay=0.0):
+    def respond(request):
+        data = json.loads(request.body)['data']
+        if isinstance(data, list):
+            if bulk_delay:
+                time.sleep(bulk_delay)
+            if bulk_status:
+                return bulk_status, {}, {'errors': [{'detail': 'bulk failed'}]}
+            return 201, {}, {'data': [node_document(item['attributes']['title']) for item in data]}
+        return 201, {}, {'data': node_document(data['attributes']['title'])}
+    return local_server(respond)
+
+
+def created_titles(server):
+    titles = []
+    for request in server.requests:
+        data = json.loads(request.body)['data']
+        titles.extend(item['attributes']['title'] for item in (data if isinstance(data, list) else [data]))
+    return titles
+
+
+def new_session(server, **config):
+    return Session(api_base_url=server.url, config={'retry_policy': RetryPolicy(backoff_base=0), **config})
+
+
+def test_bulk_create_falls_back_to_single_requests_when_rejected(local_server):
+    server = bulk_server(local_server, bulk_status=415)
+    results = Node.bulk_create(new_session(server), [{'title': 'a'}, {'title': 'b'}])
+
+    assert [result.value.title for result in results] == ['a', 'b']
+    assert sorted(created_titles(server)[2:]) == ['a', 'b']
+
+
+def test_bulk_create_does_not_repeat_after_server_error(local_server):
+    server = bulk_server(local_server, bulk_status=503)
+    results = Node.bulk_create(new_session(server), [{'title': 'a'}, {'title': 'b'}])
+
+    assert [result.ok for result in results] == [False, False]
+    assert created_titles(server) == ['a', 'b']
+
+
+def test_bulk_create_does_not_repeat_after_timeout(local_server):
+    server = bulk_server(local_server, bulk_delay=0.3)
+    results = Node.bulk_create(new_session(server, timeout=0.1), [{'title': 'a'}, {'title': 'b'}])
+
+    assert [result.ok for result in results] == [False, False]
+    time.sleep(0.3)
+    assert created_titles(server) == ['a', 'b']
@@ -0,0 +1,81 @@
+import urllib.parse
+
+from pythosf.client import Session
+
+NODES_URL = 'https://api.osf.io/v2/nodes/'
+
+
+def page_of(url):
+    return urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)['page'][0]
+
+
+def listing(next_url, total=None, per_page=None, meta_in_links=False):
+    meta = {}
+    if total is not None:
+        meta['total'] = total
+    if per_page is not None:
+        meta['per_page'] = per_page
+    response = {'data': [], 'links': {'next': next_url}}
+    if meta_in_links:
+        response['links']['meta'] = meta
+    else:
+        response['meta'] = meta
+    return response
+
+
+def test_page_urls_are_in_page_order_and_keep_the_query():
+    response = listing(NODES_URL + '?filter%5Btitle%5D=a&page=2&page%5Bsize%5D=10', total=45, per_page=10)
+    page_urls = Session._remaining_page_urls(response)
+
+    assert [page_of(url) for url in page_urls] == ['2', '3', '4', '5']
+    for url in page_urls:
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)
+        assert query['filter[title]'] == ['a']
+        assert query['page[size]'] == ['10']
+
+
+def test_exact_multiple_of_page_size_has_no_empty_last_page():
+    response = listing(NODES_URL + '?page=2', total=30, per_page=10)
+    assert [page_of(url) for url in Session._remaining_page_urls(response)] == ['2', '3']
+
+
+def test_meta_may_live_under_links():
+    response = listing(NODES_URL + '?page=2', total=25, per_page=10, meta_in_links=True)
+    assert [page_of(url) for url in Session._remaining_page_urls(response)] == ['2', '3']
+
+
+def test_falls_back_to_following_next_without_enough_to_go_on():
+    assert Session._remaining_page_urls(listing(NODES_URL + '?page=2', per_page=10)) is None
+    assert Session._remaining_page_urls(listing(NODES_URL + '?page=2', total=25)) is None
+    assert Session._remaining_page_urls(listing(NODES_URL + '?cursor=abc', total=25, per_page=10)) is None
+    assert Session._remaining_page_urls(listing(None, total=25, per_page=10)) is None
+
+
+def test_retrieve_all_follows_next_when_pages_cannot_be_computed(local_server):
+    def respond(request):
+        cursor = urllib.parse.parse_qs(urllib.parse.urlsplit(request.path).query).get('cursor', ['0'])[0]
+        following = {'0': 'b', 'b': 'c', 'c': None}[cursor]
+        next_url = server.url + 'v2/nodes/?cursor={}'.format(following) if following else None
+        return 200, {}, {'data': [{'id': cursor}], 'links': {'next': next_url}, 'meta': {'total': 3, 'per_page': 1}}
+    server = local_server(respond)
+
+    session = Session(api_base_url=server.url, config={'page_workers': 4})
+    response = session.get('v2/nodes/', retrieve_all=True)
+
+    assert [item['id'] for item in response['data']] == ['0', 'b', 'c']
+    assert len(server.requests) == 3
+
+
+def test_retrieve_all_fetches_computed_pages_in_order(local_server):
+    def respond(request):
+        page = int(urllib.parse.parse_qs(urllib.parse.urlsplit(request.path).query).get('page', ['1'])[0])
+        next_url = server.url + 'v2/nodes/?page={}'.format(page + 1) if page < 4 else None
+        return 200, {}, {'data': [{'id': str(page)}], 'links': {'next': next_url},
+                         'meta': {'total': 4, 'per_page': 1}}
+    server = local_server(respond)
+
+    session = Session(api_base_url=server.url, config={'page_workers': 4})
+    response = session.get('v2/nodes/', retrieve_all=True)
+
+    assert [item['id'] for item in response['data']] == ['1', '2', '3', '4']
+    assert len(server.requests) == 4
@@ -0,0 +1,197 @@
+import io
+import time
+
+import pytest
+import requests
+
+from pythosf.client import Session
+from pythosf.client import retry as retries
+from pythosf.client.retry import RateLimiter, RetryPolicy
+from pythosf.client.transport import PoolStats
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None, content=b'{"data": {}}'):
+        self.status_code = status_code
+        self.headers = requests.structures.CaseInsensitiveDict(headers or {})
+        self.content = content
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeTransport:
+    # Answers each request with the next queued response, or raises it if it is an exception.
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.requests = []
+        self.bodies = []
+        self.stats = PoolStats()
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url))
+        body = kwargs.get('data')
+        if hasattr(body, 'read'):
+            body = body.read()
+        elif body is not None and not isinstance(body, (str, bytes)):
+            body = b''.join(body)
+        self.bodies.append(body)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(time, 'sleep', delays.append)
+    return delays
+
+
+def new_session(*outcomes, **policy):
+    transport = FakeTransport(*outcomes)
+    session = Session(api_base_url='https://api.osf.io/', transport=transport,
+                      config={'retry_policy': RetryPolicy(jitter=False, **policy)})
+    return session, transport
+
+
+@pytest.mark.parametrize('category, method, expected', [
+    (retries.THROTTLED, 'GET', True),
+    (retries.THROTTLED, 'POST', True),
+    (retries.SERVER_ERROR, 'GET', True),
+    (retries.SERVER_ERROR, 'PUT', True),
+    (retries.SERVER_ERROR, 'DELETE', True),
+    (retries.SERVER_ERROR, 'POST', False),
+    (retries.SERVER_ERROR, 'PATCH', False),
+    (retries.CONNECTION_ERROR, 'GET', True),
+    (retries.CONNECTION_ERROR, 'POST', False),
+    (None, 'GET', False),
+])
+def test_should_retry_by_category_and_method(category, method, expected):
+    assert RetryPolicy().should_retry(category, 0, method) is expected
+
+
+def test_should_retry_stops_at_the_category_limit():
+    policy = RetryPolicy(max_retries={retries.SERVER_ERROR: 2})
+    assert policy.should_retry(retries.SERVER_ERROR, 1, 'GET')
+    assert not policy.should_retry(retries.SERVER_ERROR, 2, 'GET')
+    assert policy.should_retry(retries.THROTTLED, 2, 'GET')
+
+
+@pytest.mark.parametrize('status_code, category', [
+    (200, None), (304, None), (404, None), (429, retries.THROTTLED), (500, retries.SERVER_ERROR),
+    (503, retries.SERVER_ERROR), (504, retries.SERVER_ERROR),
+])
+def test_classify_response_status(status_code, category):
+    assert retries.classify(response=FakeResponse(status_code)) == category
+
+
+def test_retry_after_is_the_minimum_delay():
+    policy = RetryPolicy(backoff_base=0.5, jitter=False)
+    assert policy.delay(0) == 0.5
+    assert policy.delay(0, retry_after=3) == 3
+    assert policy.delay(3, retry_after=1) == 4
+    assert retries.parse_retry_after('2.5') == 2.5
+    assert retries.parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') is None
+
+
+def test_server_error_on_get_is_retried_after_retry_after(sleeps):
+    session, transport = new_session(FakeResponse(503, {'Retry-After': '2'}), FakeResponse(200))
+    assert session.get('v2/nodes/abc12/') == {'data': {}}
+    assert len(transport.requests) == 2
+    assert sleeps == [2]
+
+
+def test_server_error_on_post_is_not_retried(sleeps):
+    session, transport = new_session(FakeResponse(503), FakeResponse(201))
+    with pytest.raises(requests.exceptions.HTTPError):
+        session.post('v2/nodes/', item_type='nodes', attributes={'title': 'a'})
+    assert len(transport.requests) == 1
+    assert sleeps == []
+    assert session.error_count == 1
+
+
+def test_connection_errors_are_retried_for_idempotent_methods_only(sleeps):
+    session, transport = new_session(requests.exceptions.ConnectionError('reset'), FakeResponse(200))
+    assert session.get('v2/nodes/abc12/') == {'data': {}}
+    assert len(transport.requests) == 2
+
+    session, transport = new_session(requests.exceptions.ConnectionError('reset'), FakeResponse(201))
+    with pytest.raises(requests.exceptions.ConnectionError):
+        session.post('v2/nodes/', item_type='nodes', attributes={'title': 'a'})
+    assert len(transport.requests) == 1
+
+
+def test_file_body_is_rewound_before_a_retry(sleeps):
+    session, transport = new_session(FakeResponse(503), FakeResponse(200))
+    body = io.BytesIO(b'header' + b'payload')
+    body.read(6)
+    session.put('v2/files/abc12/', raw_body=body)
+    assert transport.bodies == [b'payload', b'payload']
+
+
+def test_body_that_cannot_be_rewound_is_not_retried(sleeps):
+    session, transport = new_session(FakeResponse(503), FakeResponse(200))
+    with pytest.raises(requests.exceptions.HTTPError):
+        session.put('v2/files/abc12/', raw_body=(chunk for chunk in [b'a', b'b']))
+    assert transport.bodies == [b'ab']
+    assert sleeps == []
+
+
+def test_throttled_request_slows_the_rate_limiter(sleeps):
+    session, transport = new_session(FakeResponse(429), FakeResponse(200), backoff_base=0.001)
+    session.rate_limiter = RateLimiter(rate=10, burst=10)
+    assert session.get('v2/nodes/abc12/') == {'data': {}}
+    assert len(transport.requests) == 2
+    assert session.rate_limiter.throttle_count == 1
+    assert session.rate_limiter.rate == pytest.approx(5 * 1.01)
+
+
+def test_throttled_request_without_retry_is_returned(sleeps):
+    session, transport = new_session(FakeResponse(429, content=b'{"errors": []}'))
+    assert session.json_api_request('v2/nodes/abc12/', method='GET', retry=False) == {'errors': []}
+    assert len(transport.requests) == 1
+
+
+def test_on_throttled_halves_the_rate_and_waits_out_retry_after():
+    limiter = RateLimiter(rate=8, burst=8)
+    limiter.on_throttled(retry_after=30)
+    assert limiter.rate == 4
+    assert limiter.throttle_count == 1
+    assert 29 < limiter.try_acquire() <= 30
+
+
+def test_on_throttled_never_drops_below_min_rate():
+    limiter = RateLimiter(rate=1, min_rate=0.5)
+    for _ in range(5):
+        limiter.on_throttled()
+    assert limiter.rate == 0.5
+
+
+def test_rate_limit_headers_set_the_rate():
+    limiter = RateLimiter()
+    limiter.on_response(FakeResponse(200, {'X-RateLimit-Remaining': '10', 'X-RateLimit-Reset': '5'}))
+    assert limiter.rate == pytest.approx(0.9 * 10 / 5)
+
+    limiter.on_response(FakeResponse(200, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '20'}))
+    assert 19 < limiter.try_acquire() <= 20
+
+
+def test_rate_limit_reset_may_be_an_epoch_timestamp():
+    limiter = RateLimiter()
+    limiter.on_response(FakeResponse(200, {'X-RateLimit-Remaining': '90',
+                                           'X-RateLimit-Reset': str(time.time() + 100)}))
+    assert limiter.rate == pytest.approx(0.9 * 90 / 100, rel=0.05)
+
+
+def test_successful_responses_raise_the_rate_slowly():
+    limiter = RateLimiter(rate=10)
+    limiter.on_response(FakeResponse(200))
+    assert limiter.rate == pytest.approx(10.1)
+    limiter.on_response(FakeResponse(500))
+    assert limiter.rate == pytest.approx(10.1)
@@ -0,0 +1,49 @@
+from pythosf.client.transfer import TransferManager, TransferOperation
+
+
+class FakeSession:
+    def __init__(self, pages=None, error=None):
+        self.pages = pages or []
+        self.error = error
+
+    def iter_pages(self, url, auth=None):
+        if self.error is not None:
+            raise self.error
+        return iter(self.pages)
+
+
+class FakeFolder:
+    def __init__(self, name, session):
+        self.session = session
+        self.relationships = type('Relationships', (), {})()
+        self.relationships.files = {'links': {'related': {'href': 'https://api.osf.io/v2/{}/'.format(name)}}}
+
+
+class FakeFile:
+    def __init__(self, name):
+        self.name = name
+        self.size = 1
+        self.updates = []
+
+    def move(self, to_folder, rename=None, conflict=None, auth=None, refresh=True):
+        pass
+
+    def _update(self, response):
+        self.updates.append(response)
+
+
+def test_deferred_refresh_failures_are_reported_per_operation():
+    error = ConnectionError('listing failed')
+    listed = FakeFolder('listed', FakeSession(pages=[{'data': [{'attributes': {'name': 'a'}}]}]))
+    failing = FakeFolder('failing', FakeSession(error=error))
+    files = [FakeFile('a'), FakeFile('b'), FakeFile('c')]
+    operations = [TransferOperation(files[0], to_folder=listed), TransferOperation(files[1], to_folder=failing),
+                  TransferOperation(files[2], to_folder=failing)]
+
+    manager = TransferManager(workers=2)
+    results = manager.run(operations)
+
+    assert all(result.ok for result in results)
+    assert manager.progress.completed == 3
+    assert manager.progress.refresh_errors == {1: error, 2: error}
+    assert files[0].updates == [{'attributes': {'name': 'a'}}]
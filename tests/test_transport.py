@@ -0,0 +1,21 @@
+from pythosf.client import Session
+from pythosf.client.transport import Transport
+
+
+def test_transport_does_not_keep_cookies(local_server):
+    server = local_server(lambda request: (200, {'Set-Cookie': 'osf=abc; Path=/'}, {'data': {}}))
+    transport = Transport()
+    transport.request('GET', server.url)
+    transport.request('GET', server.url)
+
+    assert 'Cookie' not in server.requests[1].headers
+    assert len(transport.http.cookies) == 0
+
+
+def test_session_auth_override_does_not_inherit_cookies(local_server):
+    server = local_server(lambda request: (200, {'Set-Cookie': 'osf=session-of-a; Path=/'}, {'data': {}}))
+    session = Session(api_base_url=server.url)
+    session.get(url=server.url, headers={'Authorization': 'Bearer a'})
+    session.get(url=server.url, headers={'Authorization': 'Bearer b'})
+
+    assert 'Cookie' not in server.requests[1].headers